@@ -1,7 +1,18 @@
-import re
-import copy
-from bisect import bisect
-from jinja2 import Template
+import os
+
+__version__ = '0.0.48'
+
+"""
+Dialect modules are imported on first access, e.g. `dbsa.presto.Table`.
+"""
+
+DIALECTS = ('presto', 'trino', 'hive', 'redshift')
+
+def __getattr__(name):
+    if name in DIALECTS:
+        import importlib
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
 
 """
 Markdown documentation variable
@@ -18,6 +29,154 @@ MARKDOWN = """
 {%- endfor %}
 """
 
+"""
+Compiled template cache shared by the statement generators of a dialect.
+Templates are looked up by their source, so every statement template is
+parsed and compiled once per process. When a bytecode cache directory is
+set (or `DBSA_TEMPLATE_CACHE_DIR` is defined) the compiled code is stored
+on disk as well, so new worker processes can skip the compilation.
+"""
+
+class TemplateCache(object):
+    def __init__(self, bytecode_cache_dir=None):
+        self.bytecode_cache_dir = bytecode_cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._templates = {}
+        self._environment = None
+
+    @property
+    def environment(self):
+        # jinja2 is only imported when the first template is rendered.
+        if self._environment is None:
+            from jinja2 import Environment, FunctionLoader, FileSystemBytecodeCache
+            bytecode_cache_dir = self.bytecode_cache_dir or os.environ.get('DBSA_TEMPLATE_CACHE_DIR')
+            self._environment = Environment(
+                loader=FunctionLoader(lambda source: (source, None, lambda: True)),
+                bytecode_cache=FileSystemBytecodeCache(bytecode_cache_dir) if bytecode_cache_dir else None,
+                cache_size=0,
+            )
+        return self._environment
+
+    def set_bytecode_cache_dir(self, bytecode_cache_dir):
+        self.bytecode_cache_dir = bytecode_cache_dir
+        self.clear()
+
+    def get_template(self, source):
+        template = self._templates.get(source)
+        if template is not None:
+            self.hits += 1
+            return template
+
+        self.misses += 1
+        template = self._templates[source] = self.environment.get_template(source)
+        return template
+
+    def render(self, source, **kwargs):
+        return self.get_template(source).render(**kwargs)
+
+    def cache_info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._templates)}
+
+    def clear(self):
+        self.hits = 0
+        self.misses = 0
+        self._templates = {}
+        self._environment = None
+
+"""
+Rendered statement cache shared between processes. The statements are stored
+in a SQLite database keyed by the fingerprint of the bound table, the method
+and its arguments, so repeated renderings skip Jinja entirely. The least
+recently used statements are evicted above `max_entries`. When no cache is set
+`DBSA_RENDERED_CACHE` can point to the database file.
+"""
+
+class RenderedCache(object):
+    # Recency updates of the hits are written in batches of this size.
+    _flush_size = 256
+
+    def __init__(self, path, max_entries=10000, timeout=1.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._used = {}
+        self._connection = None
+        self._pid = None
+
+    @property
+    def connection(self):
+        # SQLite connections must not be shared with forked worker processes.
+        if self._connection is None or self._pid != os.getpid():
+            import sqlite3
+            self._used = {}
+            self._connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS rendered (key TEXT PRIMARY KEY, statement TEXT NOT NULL, used REAL NOT NULL)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS rendered_used ON rendered (used)')
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, key):
+        """
+        Returns the cached statement, or None if it is missing or the
+        database can not be read (e.g. it stays locked longer than `timeout`).
+        """
+        import time
+        import sqlite3
+        try:
+            row = self.connection.execute('SELECT statement FROM rendered WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._used[key] = time.time()
+            if len(self._used) >= self._flush_size:
+                self.flush()
+            return row[0]
+        except sqlite3.Error:
+            self.errors += 1
+            return None
+
+    def set(self, key, statement):
+        import time
+        import sqlite3
+        try:
+            self.connection.execute('INSERT OR REPLACE INTO rendered (key, statement, used) VALUES (?, ?, ?)', (key, statement, time.time()))
+            self.flush()
+        except sqlite3.Error:
+            self.errors += 1
+
+    def flush(self):
+        """
+        Writes the pending recency updates and evicts the least recently
+        used statements above `max_entries`.
+        """
+        used, self._used = self._used, {}
+        with self.connection:
+            self.connection.execute('BEGIN')
+            self.connection.executemany('UPDATE rendered SET used = ? WHERE key = ?', [(t, k) for k, t in used.items()])
+            self.connection.execute(
+                'DELETE FROM rendered WHERE key IN (SELECT key FROM rendered ORDER BY used DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+
+    def cache_info(self):
+        self.flush()
+        size = self.connection.execute('SELECT COUNT(*) FROM rendered').fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'errors': self.errors, 'size': size}
+
+    def clear(self):
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._used = {}
+        self.connection.execute('DELETE FROM rendered')
+
 """
 Error message collection that can be fired during schema
 definitions.
@@ -38,6 +197,12 @@ class ColumnNameRequired(AttributeError):
 class ColumnNameNotUnique(AttributeError):
     pass
 
+class ColumnNotFound(AttributeError):
+    pass
+
+class ColumnReadOnly(AttributeError):
+    pass
+
 class NotSupportedDialect(RuntimeError):
     pass
 
@@ -47,6 +212,7 @@ Cleanup function for staging tables
 """
 
 def cleanup_fn(value, quoted, dashed):
+    import re
     rvalue = re.sub('^.*\((.*?)\)$', '\\1', str(value))
     if not quoted:
         rvalue = rvalue.replace("'", '')
@@ -55,6 +221,26 @@ def cleanup_fn(value, quoted, dashed):
                        .replace('{{ ts }}', '{{ ts_nodash }}')
     return rvalue
 
+"""
+Chunking of batch statements
+"""
+
+def chunk_by_size(items, max_size, size_fn=len):
+    """
+    Groups the items so that the summed size of each group stays under
+    `max_size`. An item bigger than the limit gets a group on its own.
+    """
+    chunk, chunk_size = [], 0
+    for item in items:
+        item_size = size_fn(item)
+        if chunk and chunk_size + item_size > max_size:
+            yield chunk
+            chunk, chunk_size = [], 0
+        chunk.append(item)
+        chunk_size += item_size
+    if chunk:
+        yield chunk
+
 """
 The following classes represents th
 """
@@ -70,12 +256,18 @@ class PII(object):
 
 
 class DataType(object):
+    __slots__ = ('drop_on', 'transform_on_delete', 'transform_on_insert', 'name')
+
     def __init__(self, drop_on=None, transform_on_insert=None, transform_on_delete=None):
         self.drop_on = drop_on
         self.transform_on_delete = transform_on_delete
         self.transform_on_insert = transform_on_insert
         self.name = None
 
+    def __deepcopy__(self, memo):
+        # Data types are shared classifications, bound columns keep referring to them.
+        return self
+
 """
 Table policies
 """
@@ -86,9 +278,10 @@ class TablePolicy(object):
 
 
 class PartitionRetentionPolicy(TablePolicy):
-    def __init__(self, ds_ago, earliest_partition=None):
+    def __init__(self, ds_ago, earliest_partition=None, drop_older=False):
         self.earliest_partition = earliest_partition
         self.ds_ago = ds_ago
+        self.drop_older = drop_older
 
     def table(self, dialect):
         if not self.earliest_partition:
@@ -97,9 +290,10 @@ class PartitionRetentionPolicy(TablePolicy):
 
     def resolve(self, dialect):
         tbl = self.table(dialect)
-        return tbl.get_delete_current_partition(
-            ignored_partitions=set(tbl.partition_names()) - set(self.earliest_partition.keys())
-        )
+        ignored_partitions = set(tbl.partition_names()) - set(self.earliest_partition.keys())
+        if self.drop_older:
+            return tbl.get_delete_partitions_before(ignored_partitions=ignored_partitions)
+        return tbl.get_delete_current_partition(ignored_partitions=ignored_partitions)
 
 
 class PartitionAnonimisationPolicy(TablePolicy):
@@ -135,32 +329,49 @@ or a column itself.
 """
 
 class TableProperty(object):
+    __slots__ = ('attrs', '_dialect', '_rendered_property')
     _property_type = None
     _req_properties = None
+    # Attributes listing column names, they are validated against the table.
+    _column_attrs = ()
 
     def __init__(self, **kwargs):
         self.attrs = kwargs or {}
+        self._dialect = Dialect
+        self._rendered_property = None
 
     def __str__(self):
-        if not self._property_type:
+        # Rendered once per dialect binding, `register_dialect` invalidates it.
+        if self._rendered_property is not None:
+            return self._rendered_property
+
+        property_type = self._dialect._property_types.get(self.__class__, self._property_type)
+        if not property_type:
             raise NotImplemented('Column._property_type is not defined or __str__ method is not implemented')
 
-        return Template(self._property_type).render(**{ k: v for k,v in self.attrs.items() })
+        self._rendered_property = self._dialect._templates.render(property_type, **{ k: v for k,v in self.attrs.items() })
+        return self._rendered_property
 
     def register_dialect(self, dialect):
-        self._req_properties = dialect._req_properties.get(self.__class__)
-        self._property_type = dialect._property_types.get(self.__class__)
-        if not p._property_type: raise NotSupportedDialect
+        req_properties = dialect._req_properties.get(self.__class__)
+        if not dialect._property_types.get(self.__class__): raise NotSupportedDialect
+        self._dialect = dialect.__class__
+        self._rendered_property = None
 
-        if not (set(self._req_properties or []) <= set((self.attrs or {}).keys())):
-            raise ColumnAttributesMissing('{} - following attributes are required: {}'.format(self.name, self._req_properties))
+        if not (set(req_properties or []) <= set((self.attrs or {}).keys())):
+            raise ColumnAttributesMissing('{} - following attributes are required: {}'.format(self.__class__.__name__, req_properties))
 
 class Column(object):
-    _creation_counter = 0
+    # The dialect's required properties (e.g. `length`, `encode`) are set as
+    # attributes, `__dict__` is only allocated for the columns that have them.
+    # `_shared` must stay the last slot, copies restore the slots in order.
+    __slots__ = (
+        'name', 'value', 'default_value', 'partition', 'pii', 'attrs', 'comment', 'manually_set',
+        '_creation_counter', '_dialect', '_rendered_column_type', '__dict__', '_shared',
+    )
+    _columns_created = 0
     _column_type = None
     _req_properties = None
-    _how_to_quote = '"{}"'
-    _column_setter = '{} AS {}'
 
     def __init__(self, name=None, pii=None, comment=None, default_value=None, **kwargs):
         # Store base column values
@@ -173,9 +384,14 @@ class Column(object):
         self.comment = comment
         self.manually_set = False
 
+        # Dialect specific values are set up by `register_dialect`, the
+        # base Dialect provides the defaults for unbound columns.
+        self._dialect = Dialect
+        self._rendered_column_type = None
+
         # Set up Creation Counter to track number of columns and its order
-        self._creation_counter = Column._creation_counter
-        Column._creation_counter += 1
+        self._creation_counter = Column._columns_created
+        Column._columns_created += 1
 
     def __cmp__(self, other):
         return cmp(self._creation_counter, other._creation_counter)
@@ -183,6 +399,54 @@ class Column(object):
     def __lt__(self, other):
         return self._creation_counter < other._creation_counter
 
+    def __setattr__(self, name, value):
+        # Bound columns are shared by every instance of the table class, only
+        # the memoized column type can be set on them.
+        if name != '_rendered_column_type' and getattr(self, '_shared', False):
+            raise ColumnReadOnly('{} - bound columns are shared between the tables, modify the column through the table attribute (e.g. `table.{}`) instead'.format(self.name, self.name))
+        object.__setattr__(self, name, value)
+
+    def __copy__(self):
+        # Copies of the shared bound columns are owned by a single table instance.
+        column = self.__class__.__new__(self.__class__)
+        for cls in self.__class__.__mro__:
+            for slot in cls.__dict__.get('__slots__', ()):
+                if slot not in ('__dict__', '_shared') and hasattr(self, slot):
+                    object.__setattr__(column, slot, getattr(self, slot))
+        column.__dict__.update(self.__dict__)
+        return column
+
+    def __get__(self, instance, owner):
+        # Accessing a column on a Table instance returns the instance's own
+        # copy of the bound column, so it can be modified without touching
+        # the shared bound schema.
+        if instance is None or instance.__dict__.get('_column_overrides') is None:
+            return self
+        return instance._override_column(self.name)
+
+    @property
+    def _how_to_quote(self):
+        return self._dialect._how_to_quote_column
+
+    @property
+    def _column_setter(self):
+        return self._dialect._column_setter
+
+    def _template_context(self):
+        req_properties = self._dialect._req_properties.get(self.__class__, self._req_properties) or []
+        context = {rp: self.attrs[rp] for rp in req_properties}
+        context.update(
+            name=self.name,
+            value=self.value,
+            default_value=self.default_value,
+            partition=self.partition,
+            pii=self.pii,
+            attrs=self.attrs,
+            comment=self.comment,
+            manually_set=self.manually_set,
+        )
+        return context
+
     def set_column_value(self, value):
         self.value = value
         self.manually_set = True
@@ -205,28 +469,52 @@ class Column(object):
         if self.pii.transform_on_insert is not None:
             return self._column_setter.format(self.pii.transform_on_insert.format(quoted_name=self.quoted_name), self.quoted_name)
 
+    def load_value(self, source):
+        """
+        Returns the expression loading the column from the `source` alias,
+        applying the same PII rules as `default_load_value`.
+        """
+        source_value = '{}.{}'.format(source, self.quoted_name)
+        if self.manually_set:
+            return self.value or source_value
+
+        if self.pii.drop_on == PII.INSERT:
+            return 'NULL'
+
+        if self.pii.transform_on_insert is not None:
+            return self.pii.transform_on_insert.format(quoted_name=source_value)
+
+        return source_value
+
     @property
     def column_type(self):
-        if not self._column_type:
+        # Nested types (Array, Map, Row) reuse the memoized type of their
+        # children, so a column type is rendered once per dialect binding.
+        if self._rendered_column_type is not None:
+            return self._rendered_column_type
+
+        column_type = self._dialect._column_types.get(self.__class__, self._column_type)
+        if not column_type:
             raise NotImplemented('Column._column_type is not defined or __str__ method is not implemented')
 
-        return Template(self._column_type).render(**self.__dict__)
+        self._rendered_column_type = self._dialect._templates.render(column_type, **self._template_context())
+        return self._rendered_column_type
 
     def register_dialect(self, dialect):
-        self._how_to_quote = dialect._how_to_quote_column
-        self._column_setter = dialect._column_setter
-        self._req_properties = dialect._req_properties.get(self.__class__, self._req_properties)
-        self._column_type = dialect._column_types.get(self.__class__, self._column_type)
-        if not self._column_type: raise NotSupportedDialect
+        req_properties = dialect._req_properties.get(self.__class__, self._req_properties)
+        if not dialect._column_types.get(self.__class__, self._column_type): raise NotSupportedDialect
+        self._dialect = dialect.__class__
+        self._rendered_column_type = None
 
-        if not (set(self._req_properties or []) <= set((self.attrs or {}).keys())):
-            raise ColumnAttributesMissing('{} - following attributes are required: {}'.format(self.name, self._req_properties))
+        if not (set(req_properties or []) <= set((self.attrs or {}).keys())):
+            raise ColumnAttributesMissing('{} - following attributes are required: {}'.format(self.name, req_properties))
 
-        for rp in set(self._req_properties or []):
+        for rp in set(req_properties or []):
             setattr(self, rp, self.attrs[rp])
 
 
 class Partition(Column):
+    __slots__ = ('column',)
     _column_type = '{{ column.column_type }}'
     def __init__(self, column, value=None, name=None, **kwargs):
         super(Partition, self).__init__(**kwargs)
@@ -238,84 +526,105 @@ class Partition(Column):
     def default_load_value(self):
         return self._column_setter.format(self.value or self.quoted_name, self.quoted_name)
 
+    def load_value(self, source):
+        return self.value or '{}.{}'.format(source, self.quoted_name)
+
+    def _template_context(self):
+        context = super(Partition, self)._template_context()
+        context['column'] = self.column
+        return context
+
     def register_dialect(self, dialect):
         super(Partition, self).register_dialect(dialect)
         self.column.register_dialect(dialect)
 
-        for rp in set(self.column._req_properties or []):
+        for rp in set(dialect._req_properties.get(self.column.__class__, self.column._req_properties) or []):
             setattr(self, rp, self.column.attrs[rp])
 
 # Default base table properties for schema matching between dialects
 
 class Format(TableProperty):
-    pass
+    __slots__ = ()
 
 class Bucket(TableProperty):
-    pass
+    __slots__ = ()
 
 class Sortkey(TableProperty):
-    pass
+    __slots__ = ()
 
 class DistributionKey(TableProperty):
-    pass
+    __slots__ = ()
 
 class DistributionStyle(TableProperty):
-    pass
+    __slots__ = ()
+
+class SortedBy(TableProperty):
+    __slots__ = ()
+    _column_attrs = ('by',)
+
+class BloomFilter(TableProperty):
+    __slots__ = ()
+    _column_attrs = ('columns',)
+
+class PartitionTransforms(TableProperty):
+    __slots__ = ()
 
 # Default base column types for schema matching between dialects
 
 class Boolean(Column):
-    pass
+    __slots__ = ()
 
 class Tinyint(Column):
-    pass
+    __slots__ = ()
 
 class Smallint(Column):
-    pass
+    __slots__ = ()
 
 class Integer(Column):
-    pass
+    __slots__ = ()
 
 class Bigint(Column):
-    pass
+    __slots__ = ()
 
 class Real(Column):
-    pass
+    __slots__ = ()
 
 class Double(Column):
-    pass
+    __slots__ = ()
 
 class Decimal(Column):
-    pass
+    __slots__ = ()
 
 class Varchar(Column):
-    pass
+    __slots__ = ()
 
 class Char(Column):
-    pass
+    __slots__ = ()
 
 class Varbinary(Column):
-    pass
+    __slots__ = ()
 
 class JSON(Column):
-    pass
+    __slots__ = ()
 
 class Date(Column):
-    pass
+    __slots__ = ()
 
 class Time(Column):
-    pass
+    __slots__ = ()
 
 class Timestamp(Column):
-    pass
+    __slots__ = ()
 
 class Array(Column):
+    __slots__ = ()
     _req_properties = {'data_type'}
     def register_dialect(self, dialect):
         super(Array, self).register_dialect(dialect)
         self.data_type.register_dialect(dialect)
 
 class Map(Column):
+    __slots__ = ()
     _req_properties = {'primitive_type', 'data_type'}
     def register_dialect(self, dialect):
         super(Map, self).register_dialect(dialect)
@@ -323,6 +632,7 @@ class Map(Column):
         self.data_type.register_dialect(dialect)
 
 class Row(Column):
+    __slots__ = ()
     _req_properties = {'columns'}
     def register_dialect(self, dialect):
         super(Row, self).register_dialect(dialect)
@@ -330,12 +640,14 @@ class Row(Column):
             c.register_dialect(dialect)
 
 class IPAddress(Column):
-    pass
+    __slots__ = ()
 
 
 # Class registers that counts all occurances and validates column existance
 
 class Prototype(object):
+    __slots__ = ('columns', 'partitions', 'non_partitions', 'props', 'policies', 'column_index')
+
     def __init__(self, columns, props, policies):
         if not len(columns):
             raise ColumnRequired('Prototype requires at least one Column!')
@@ -350,14 +662,176 @@ class Prototype(object):
 
             known_column_names.add(column.name)
 
-        self.columns = columns
-        self.props = props
-        self.policies = policies
+        for prop in props:
+            for attr in prop._column_attrs:
+                for column_name in prop.attrs.get(attr) or []:
+                    # Sort orders may carry a direction, e.g. `ts DESC`.
+                    if column_name.split()[0] not in known_column_names:
+                        raise ColumnNotFound('{} - column {} does not exist'.format(prop.__class__.__name__, column_name))
+
+        self.columns = tuple(columns)
+        self.partitions = tuple(column for column in columns if column.partition)
+        self.non_partitions = tuple(column for column in columns if not column.partition)
+        self.props = tuple(props)
+        self.policies = tuple(policies)
+        self.column_index = {column.name: column for column in columns}
+
+
+class ColumnIndex(object):
+    __slots__ = ('columns', 'partitions', 'non_partitions', 'by_name')
+
+    def __init__(self, prototype, overrides=None, extra_columns=None):
+        # The prototype's lookups are reused for everything that is not
+        # overridden, usually only the partitions are.
+        overrides, extra_columns = overrides or {}, extra_columns or []
+        if not overrides and not extra_columns:
+            self.columns = prototype.columns
+            self.partitions = prototype.partitions
+            self.non_partitions = prototype.non_partitions
+            self.by_name = prototype.column_index
+            return
+
+        self.columns = tuple([overrides.get(c.name, c) for c in prototype.columns] + extra_columns)
+        self.partitions = tuple([overrides.get(c.name, c) for c in prototype.partitions] + [c for c in extra_columns if c.partition])
+        self.non_partitions = prototype.non_partitions
+        if extra_columns or not all(c.partition for c in overrides.values()):
+            self.non_partitions = tuple(c for c in self.columns if not c.partition)
+        self.by_name = dict(prototype.column_index)
+        self.by_name.update(overrides)
+        self.by_name.update((c.name, c) for c in extra_columns)
+
+
+"""
+Deterministic description of the schema objects, used by the fingerprints
+"""
+
+def describe_object(obj):
+    if callable(obj):
+        raise TypeError('{!r} can not be described deterministically'.format(obj))
+
+    if isinstance(obj, Column):
+        description = dict(vars(obj))
+        description.update((k, getattr(obj, k)) for k in ('name', 'value', 'default_value', 'partition', 'pii', 'attrs', 'comment', 'manually_set'))
+        if isinstance(obj, Partition):
+            description['column'] = obj.column
+    elif isinstance(obj, DataType):
+        description = {k: getattr(obj, k) for k in DataType.__slots__}
+    elif isinstance(obj, TableProperty):
+        description = {'attrs': obj.attrs}
+    elif isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=repr)
+    elif isinstance(obj, tuple):
+        return list(obj)
+    elif hasattr(obj, '__dict__'):
+        description = dict(vars(obj))
+    else:
+        return repr(obj)
+
+    description['class'] = '{}.{}'.format(obj.__class__.__module__, obj.__class__.__name__)
+    return description
+
+
+def hash_description(description):
+    import json
+    import hashlib
+    return hashlib.sha256(json.dumps(description, sort_keys=True, default=describe_object).encode('utf-8')).hexdigest()
+
+"""
+Registry of the declared tables. Every table class registers itself when it
+is created, and tables can be resolved lazily by the `schema.ClassName` alias
+of an index file built ahead of time, importing only the defining module.
+"""
+
+def snake_case(name):
+    # Same as re.sub('(?!^)([A-Z]+)', r'_\1', name).lower(), without importing re.
+    chars = []
+    for i, char in enumerate(name):
+        if i and 'A' <= char <= 'Z' and (i == 1 or not 'A' <= name[i-1] <= 'Z'):
+            chars.append('_')
+        chars.append(char)
+    return ''.join(chars).lower()
+
+
+class TableRegistry(object):
+    # Every table class is registered once, the registries only keep their
+    # own index, so a new registry sees the tables declared before it.
+    _tables = {}
+
+    def __init__(self):
+        self._index = {}
+
+    @classmethod
+    def register(cls, table_cls):
+        cls._tables['{}.{}'.format(table_cls.__module__, table_cls.__name__)] = table_cls
+
+    def __contains__(self, name):
+        return name in self._tables or name in self._index
+
+    def __iter__(self):
+        return iter(list(self._tables.values()))
+
+    def _update_index(self, index):
+        # The aliases only contain the last segment of the module name, so
+        # `a.default` and `b.default` can not be indexed together.
+        for name, module_name in index.items():
+            if self._index.get(name, module_name) != module_name:
+                raise ValueError('{} is defined by both {} and {}!'.format(name, self._index[name], module_name))
+        self._index.update(index)
+
+    def load_index(self, path):
+        import json
+        with open(path) as f:
+            self._update_index(json.load(f))
+
+    def build_index(self, module_names, path=None):
+        import json
+        import importlib
+        index = {}
+        for module_name in module_names:
+            module = importlib.import_module(module_name)
+            schema = module.__name__.rsplit('.', 1)[-1]
+            for cls in list(self._tables.values()):
+                if cls.__module__ == module.__name__:
+                    name = '{}.{}'.format(schema, cls.__name__)
+                    if index.get(name, module.__name__) != module.__name__:
+                        raise ValueError('{} is defined by both {} and {}!'.format(name, index[name], module.__name__))
+                    index[name] = module.__name__
+
+        self._update_index(index)
+        if path:
+            with open(path, 'w') as f:
+                json.dump(index, f, indent=2, sort_keys=True)
+
+        return index
+
+    def resolve(self, name):
+        if '.' not in name:
+            raise LookupError('{} is not a registered table!'.format(name))
+
+        module_name, cls_name = name.rsplit('.', 1)
+        module_name = self._index.get(name, module_name)
+        key = '{}.{}'.format(module_name, cls_name)
+        if key not in self._tables:
+            import importlib
+            try:
+                importlib.import_module(module_name)
+            except ModuleNotFoundError as e:
+                # Missing imports of an existing schema module are not hidden.
+                if e.name != module_name and not module_name.startswith(e.name + '.'):
+                    raise
+                raise LookupError('{} is not a registered table!'.format(name))
+
+        if key not in self._tables:
+            raise LookupError('{} is not a registered table!'.format(name))
+        return self._tables[key]
+
+registry = TableRegistry()
 
 
 class PrototypeGenerator(type):
     def __new__(metacls, name, bases, namespace, **kwds):
         cls = super(PrototypeGenerator, metacls).__new__(metacls, name, bases, dict(namespace))
+        cls._table_name = snake_case(name)
         columns, props, policies = [], [], []
 
         bases_namespace = {}
@@ -368,14 +842,18 @@ class PrototypeGenerator(type):
         for name, obj in bases_namespace.items():
             if isinstance(obj, Column):
                 obj.name = name
-                columns.insert(bisect(columns, obj), obj)
+                columns.append(obj)
             if isinstance(obj, TableProperty):
                 props.append(obj)
             if isinstance(obj, TablePolicy):
                 policies.append(obj)
 
         if len(columns):
+            columns.sort()
             cls._prototype = Prototype(columns, props, policies)
+            cls._bound_prototypes = {}
+            cls._bound_fingerprints = {}
+            registry.register(cls)
 
         return cls
 
@@ -405,23 +883,128 @@ class Table(object):
         if not hasattr(self, '_prototype'):
             raise PrototypeRequired('Prototype declaration is required!')
 
-        self._columns = []
-        for column in self._prototype.columns:
-            setattr(self, column.name, copy.copy(column))
-            self._columns.append(getattr(self, column.name))
-            if column.name in values.keys():
-                getattr(self, column.name).value = values[column.name]
-
-        self._props = copy.copy(self._prototype.props)
+        # Columns are shared with every instance of the class (and bound once
+        # per dialect), the instance only keeps its own copy of the columns
+        # that got a value or were accessed directly.
+        self._bound_prototype = self._prototype
+        self._column_overrides = {}
+        self._extra_columns = []
+        self._column_index = None
+        self._fingerprint = None
+        for name, value in values.items():
+            if name in self._prototype.column_index:
+                self._override_column(name).value = value
+
+        self._props = list(self._prototype.props)
         self._policies = {p.__class__.__name__ : p for p in self._prototype.policies}
 
         self.schema = schema
         self.dialect = None
         self.register_dialect(dialect)
 
+    @classmethod
+    def get_bound_prototype(cls, dialect):
+        bound_prototype = cls._bound_prototypes.get(dialect.__class__)
+        if bound_prototype is not None:
+            return bound_prototype
+
+        import copy
+        columns = copy.deepcopy(cls._prototype.columns)
+        for c in columns:
+            c.register_dialect(dialect)
+            c._shared = True
+
+        props = [copy.copy(p) for p in cls._prototype.props]
+        for p in props:
+            if not dialect._property_types.get(p.__class__): raise NotSupportedDialect
+            p._dialect = dialect.__class__
+            p._rendered_property = None
+
+        bound_prototype = cls._bound_prototypes[dialect.__class__] = Prototype(columns, props, cls._prototype.policies)
+        return bound_prototype
+
+    @classmethod
+    def get_bound_fingerprint(cls, dialect):
+        # Hash of the class with its bound columns and properties, computed
+        # once per dialect, the instances only hash what they change.
+        fingerprint = cls._bound_fingerprints.get(dialect.__class__)
+        if fingerprint is not None:
+            return fingerprint
+
+        bound_prototype = cls.get_bound_prototype(dialect)
+        fingerprint = cls._bound_fingerprints[dialect.__class__] = hash_description({
+            'version': __version__,
+            'dialect': '{}.{}'.format(dialect.__class__.__module__, dialect.__class__.__name__),
+            'table': '{}.{}'.format(cls.__module__, cls.__name__),
+            'doc': cls.__doc__,
+            'columns': bound_prototype.columns,
+            'properties': bound_prototype.props,
+            'policies': sorted(bound_prototype.policies, key=lambda p: p.__class__.__name__),
+        })
+        return fingerprint
+
+    def _override_column(self, name):
+        # The column is returned to be modified, so the fingerprint is reset.
+        self._fingerprint = None
+        column = self._column_overrides.get(name)
+        if column is None:
+            import copy
+            column = self._column_overrides[name] = copy.copy(self._bound_prototype.column_index[name])
+            self.__dict__[name] = column
+            self._column_index = None
+        return column
+
+    def clone(self, **values):
+        """
+        Returns a copy of the table that shares the bound columns with this
+        one, and only overrides the given column values.
+        """
+        import copy
+        table = copy.copy(self)
+        table._props = list(self._props)
+        table._policies = dict(self._policies)
+        table._column_overrides = {}
+        table._extra_columns = list(self._extra_columns)
+        table._column_index = None
+        for name, column in self._column_overrides.items():
+            column = table._column_overrides[name] = copy.copy(column)
+            table.__dict__[name] = column
+
+        for name, value in values.items():
+            if name in self._bound_prototype.column_index:
+                table._override_column(name).value = value
+
+        return table
+
+    @property
+    def column_index(self):
+        # Ordered lookups of the current columns, rebuilt only when a column
+        # gets overridden, added or the table is bound to another dialect.
+        if self._column_index is None:
+            self._column_index = ColumnIndex(self._bound_prototype, self._column_overrides, self._extra_columns)
+        return self._column_index
+
+    @property
+    def _columns(self):
+        return self.column_index.columns
+
     @property
     def partitions(self):
-        return [c for c in self._columns if c.partition]
+        return self.column_index.partitions
+
+    @property
+    def non_partitions(self):
+        return self.column_index.non_partitions
+
+    def get_column(self, name):
+        return self.column_index.by_name.get(name)
+
+    def manually_set_columns(self, include_partitions=True):
+        # Only the instance's own columns can be set manually, the shared
+        # bound columns are never modified.
+        columns = sorted(c for c in self._column_overrides.values() if c.manually_set)
+        columns.extend(c for c in self._extra_columns if c.manually_set)
+        return [c for c in columns if (not c.partition) or include_partitions]
 
     @property
     def properties(self):
@@ -429,7 +1012,7 @@ class Table(object):
 
     @property
     def table_name(self):
-        return re.sub('(?!^)([A-Z]+)', r'_\1', self.__class__.__name__).lower()
+        return self._table_name
 
     @property
     def table_name_with_prefix(self):
@@ -443,11 +1026,12 @@ class Table(object):
             if isinstance(p, type):
                 return p
 
-    def partition_definition(self, cleanup_fn=cleanup_fn):
+    def partition_definition(self, cleanup_fn=cleanup_fn, params=None):
+        values = self.get_current_partition_params(params)
         return '/'.join('{name}={value}'.format(
             name=p.name,
-            value=cleanup_fn(p.value, quoted=False, dashed=True),
-        ) for p in self.partitions if p.value is not None)
+            value=cleanup_fn(values[p.name], quoted=False, dashed=True),
+        ) for p in self.partitions if p.name in values)
 
     def staging_table_name(self, cleanup_fn=cleanup_fn):
         named_partitions = '_'.join(cleanup_fn(c.value, quoted=False, dashed=False) for c in self.partitions if c.value)
@@ -459,15 +1043,23 @@ class Table(object):
 
     def register_dialect(self, dialect):
         if dialect is None: return
+        if self.dialect is not None and self.dialect.__class__ is dialect.__class__:
+            self.dialect = dialect
+            return
 
-        for c in self._columns:
-            c.register_dialect(dialect)
+        self._bound_prototype = self.get_bound_prototype(dialect)
+        self._fingerprint = None
+        overrides, self._column_overrides = self._column_overrides, {}
+        for name, column in overrides.items():
+            bound_column = self._override_column(name)
+            bound_column.value = column.value
+            bound_column.manually_set = column.manually_set
 
-        for p in self._props:
-            p._req_properties = dialect._req_properties.get(p.__class__)
-            p._property_type = dialect._property_types.get(p.__class__)
-            if not p._property_type: raise NotSupportedDialect
+        for c in self._extra_columns:
+            c.register_dialect(dialect)
 
+        self._column_index = None
+        self._props = list(self._bound_prototype.props)
         self._how_to_quote = dialect._how_to_quote_table
         self._sample_value_function = dialect._sample_value_function
         self.dialect = dialect
@@ -476,8 +1068,9 @@ class Table(object):
         return text if not quoted else self._how_to_quote.format(text)
 
     def columns(self, include_partitions=True, filter_fn=None):
-        columns = self._columns if not filter_fn else filter(filter_fn, self._columns)
-        return [c for c in columns if (not c.partition) or include_partitions]
+        columns = self.column_index.columns if include_partitions else self.column_index.non_partitions
+        if not filter_fn: return list(columns)
+        return [c for c in columns if filter_fn(c)]
 
     def column_names(self, include_partitions=True, filter_fn=None, as_list=False):
         column_names = [c.name for c in self.columns(include_partitions=include_partitions, filter_fn=filter_fn)]
@@ -507,10 +1100,10 @@ class Table(object):
         _params.update(params or {})
         return _params
 
-    def get_current_partition_condition(self, condition='', ignored_partitions=None, sep=' AND '):
-        partition_names = {p.name for p in self.partitions} - set(ignored_partitions or [])
-        partitions = [p for p in self.partitions if p.name in partition_names]
-        conditions = ['{quoted_name} = {{{name}}}'.format(name=p.name, quoted_name=p.quoted_name) for p in partitions]
+    def get_current_partition_condition(self, condition='', ignored_partitions=None, sep=' AND ', operator='='):
+        ignored_partitions = set(ignored_partitions or [])
+        partitions = [p for p in self.partitions if p.name not in ignored_partitions]
+        conditions = ['{quoted_name} {operator} {{{name}}}'.format(name=p.name, quoted_name=p.quoted_name, operator=operator) for p in partitions]
         if condition: conditions.append(condition)
         return sep.join(conditions)
 
@@ -523,8 +1116,15 @@ class Dialect(object):
     _how_to_quote_column = '"{}"'
     _column_setter = '{} AS {}'
     _sample_value_function = 'MAX({c})'
+    _templates = TemplateCache()
+    # Presto's default query.max-length, the batch statements are split to stay below it.
+    _max_statement_size = 1000000
+    # Whether partitions can be added or changed without rebuilding the table.
+    _partition_evolution = False
+    _rendered_cache = None
     _exposed_table_functions = [
         'partitions',
+        'non_partitions',
         'properties',
         'table_name',
         'table_name_with_prefix',
@@ -532,6 +1132,8 @@ class Dialect(object):
         'staging_table_name',
         'staging_table_name_with_prefix',
         'columns',
+        'get_column',
+        'manually_set_columns',
         'column_names',
         'partition_names',
         'full_table_name',
@@ -544,24 +1146,104 @@ class Dialect(object):
     def __init__(self, table):
         self.table = table
         self.table.register_dialect(self)
-        for fn in self._exposed_table_functions:
-            if not hasattr(self, fn):
-                setattr(self, fn, getattr(self.table, fn))
+
+    def __getattr__(self, name):
+        # Exposed table functions are resolved on the table when they are used,
+        # so binding (and cloning) a dialect does not evaluate any of them.
+        if name in self._exposed_table_functions and 'table' in self.__dict__:
+            return getattr(self.table, name)
+        raise AttributeError("'{}' object has no attribute '{}'".format(self.__class__.__name__, name))
+
+    def __dir__(self):
+        return sorted(set(super(Dialect, self).__dir__()) | set(self._exposed_table_functions))
 
     def add_table_column(self, column):
-        self.table._columns.append(column)
+        self.table._extra_columns.append(column)
+        self.table._column_index = None
+        self.table._fingerprint = None
         setattr(self.table, column.name, column)
         column.register_dialect(self)
 
     def to_markdown(self, header='###'):
         import inspect
-        return Template(MARKDOWN).render(t=self.table, inspect=inspect, header=header)
+        return self._templates.render(MARKDOWN, t=self.table, inspect=inspect, header=header)
 
     def clone(self, **kwargs):
-        return self.__class__(self.table.__class__(
-            schema=self.table.schema,
-            **kwargs,
-        ))
+        return self.__class__(self.table.clone(**kwargs))
+
+    @classmethod
+    def template_cache_info(cls):
+        return cls._templates.cache_info()
+
+    @classmethod
+    def set_rendered_cache(cls, rendered_cache):
+        # Shared by every dialect, the fingerprints contain the dialect.
+        Dialect._rendered_cache = rendered_cache
+
+    def fingerprint(self):
+        """
+        Returns a deterministic hash of everything the rendered statements
+        depend on: the table class, its columns with their types, values and
+        PII rules, the properties, the dialect and the dbsa version. The hash
+        is memoized on the table until its columns or dialect change.
+        """
+        table = self.table
+        # Only the instance's own columns can change between two calls.
+        state = (
+            self.__class__, table.schema, table.table_prefix, len(table._props),
+            [(c.value, c.manually_set) for c in table._column_overrides.values()],
+            [(c.value, c.manually_set) for c in table._extra_columns],
+        )
+        if table._fingerprint is not None and table._fingerprint[0] == state:
+            return table._fingerprint[1]
+
+        # The class and its bound columns are hashed once per dialect, the
+        # instance adds the columns that differ from the bound ones.
+        bound_prototype = table._bound_prototype
+        policies = [table._policies[name] for name in sorted(table._policies)]
+        description = {
+            'bound': table.get_bound_fingerprint(self),
+            'schema': table.schema,
+            'table_prefix': table.table_prefix,
+            'columns': [
+                column for name, column in sorted(table._column_overrides.items())
+                if describe_object(column) != describe_object(bound_prototype.column_index[name])
+            ],
+            'extra_columns': table._extra_columns,
+            'properties': table._props if table._props != list(bound_prototype.props) else None,
+            'policies': policies if policies != sorted(bound_prototype.policies, key=lambda p: p.__class__.__name__) else None,
+        }
+        fingerprint = hash_description(description)
+        table._fingerprint = (state, fingerprint)
+        return fingerprint
+
+    def render_cached(self, method, *args, **kwargs):
+        """
+        Returns `getattr(self, method)(*args, **kwargs)` through the rendered
+        statement cache. Calls with arguments that can not be described
+        deterministically (e.g. `filter_fn`) and non-text results are not cached,
+        and the statements are rendered directly if the cache fails.
+        """
+        rendered_cache = Dialect._rendered_cache
+        if rendered_cache is None and os.environ.get('DBSA_RENDERED_CACHE'):
+            rendered_cache = Dialect._rendered_cache = RenderedCache(os.environ['DBSA_RENDERED_CACHE'])
+        if rendered_cache is None:
+            return getattr(self, method)(*args, **kwargs)
+
+        import json
+        import hashlib
+        try:
+            arguments = json.dumps([args, kwargs], sort_keys=True, default=describe_object)
+        except TypeError:
+            return getattr(self, method)(*args, **kwargs)
+
+        key = hashlib.sha256('{}:{}:{}'.format(self.fingerprint(), method, arguments).encode('utf-8')).hexdigest()
+        statement = rendered_cache.get(key)
+        if statement is None:
+            statement = getattr(self, method)(*args, **kwargs)
+            if isinstance(statement, str):
+                rendered_cache.set(key, statement)
+        return statement
 
     def lookup_policy(self, type_cls):
         return self.table._policies.get(type_cls.__name__)
@@ -602,9 +1284,244 @@ class Dialect(object):
             suffix=suffix,
         )
 
+    def get_partitions_before_condition(self, condition='', ignored_partitions=None):
+        """
+        Returns the condition matching the partitions older than the current
+        one, comparing the partition columns in order, e.g.
+        `ds < {ds} OR (ds = {ds} AND hour < {hour})`.
+        """
+        ignored_partitions = set(ignored_partitions or [])
+        partitions = [p for p in self.table.partitions if p.name not in ignored_partitions]
+        if not partitions:
+            raise ValueError('{} - at least one partition column must not be ignored!'.format(self.table.table_name))
+
+        conditions = []
+        for i, partition in enumerate(partitions):
+            equals = ['{} = {{{}}}'.format(p.quoted_name, p.name) for p in partitions[:i]]
+            conditions.append(' AND '.join(equals + ['{} < {{{}}}'.format(partition.quoted_name, partition.name)]))
+
+        older = conditions[0] if len(conditions) == 1 else '({})'.format(' OR '.join(
+            c if i == 0 else '({})'.format(c) for i, c in enumerate(conditions)
+        ))
+        return ' AND '.join([older, condition]) if condition else older
+
+    def get_delete_partitions_before(self, condition='', params=None, ignored_partitions=None, suffix=''):
+        """
+        Returns the statement removing every partition older than the current one.
+        """
+        return self.get_delete_from(
+            condition=self.get_partitions_before_condition(condition, ignored_partitions),
+            params=self.table.get_current_partition_params(params),
+            suffix=suffix,
+        )
+
+    def get_merge_condition(self, primary_keys, target='t', source='s'):
+        """
+        Returns the MERGE condition matching the rows on the primary keys, and
+        the target on the current value of its partitions.
+        """
+        conditions = [
+            '{target}.{c} = {source}.{c}'.format(target=target, source=source, c=self.table.get_column(pk).quoted_name)
+            for pk in primary_keys
+        ]
+        conditions.extend('{}.{} = {}'.format(target, p.quoted_name, p.value) for p in self.table.partitions if p.value)
+        return ' AND '.join(conditions)
+
+    def get_partition_locations(self, partitions, hdfs_path):
+        """
+        Returns the location of every partition value dict under `hdfs_path`
+        following the `name=value` directory layout.
+        """
+        return [
+            '{}/{}'.format(hdfs_path.rstrip('/'), self.table.partition_definition(params=params))
+            for params in partitions
+        ]
+
+    def get_partitions_condition(self, partitions, ignored_partitions=None):
+        """
+        Returns the condition matching every partition value dict and its
+        parameters. A single partition column is matched with IN, multiple
+        columns with an OR of the per partition conditions.
+        """
+        ignored_partitions = set(ignored_partitions or [])
+        columns = [p for p in self.table.partitions if p.name not in ignored_partitions]
+        if not columns:
+            raise ValueError('{} - at least one partition column must not be ignored!'.format(self.table.table_name))
+
+        conditions, params = [], {}
+        for i, partition_params in enumerate(partitions):
+            partition_params = self.table.get_current_partition_params(partition_params)
+            keys = []
+            for p in columns:
+                keys.append('{}_{}'.format(p.name, i))
+                params[keys[-1]] = partition_params[p.name]
+            conditions.append(keys)
+
+        if len(columns) == 1:
+            condition = '{} IN ({})'.format(columns[0].quoted_name, ', '.join('{{{}}}'.format(k[0]) for k in conditions))
+        else:
+            condition = ' OR '.join(
+                '({})'.format(' AND '.join('{} = {{{}}}'.format(p.quoted_name, k) for p, k in zip(columns, keys)))
+                for keys in conditions
+            )
+        return condition, params
+
+    def get_delete_partitions(self, partitions, ignored_partitions=None, suffix='', max_statement_size=None):
+        """
+        Returns the DELETE statements removing every partition value dict,
+        split to stay under `max_statement_size` characters.
+        """
+        max_statement_size = (max_statement_size or self._max_statement_size) - len(self.get_delete_from(suffix=suffix))
+        statements = []
+        for chunk in chunk_by_size(partitions, max_statement_size, self._partition_size):
+            condition, params = self.get_partitions_condition(chunk, ignored_partitions)
+            statements.append(self.get_delete_from(condition=condition, params=params, suffix=suffix))
+        return statements
+
+    def _get_partition_clause_condition(self, ignored_partitions=None):
+        # Condition template of the `PARTITION(...)` clauses of the batch statements.
+        condition = self.table.get_current_partition_condition('', ignored_partitions, sep=', ')
+        if not condition:
+            raise ValueError('{} - at least one partition column must not be ignored!'.format(self.table.table_name))
+        return condition
+
+    def _batch_statements(self, template, clauses, max_statement_size=None, **context):
+        """
+        Renders the template with as many clauses per statement as the
+        `max_statement_size` allows, including the statement's own text.
+        """
+        if not clauses:
+            return []
+
+        max_statement_size = (max_statement_size or self._max_statement_size) - len(self._templates.render(template, clauses=[], **context))
+        return [
+            self._templates.render(template, clauses=chunk, **context)
+            for chunk in chunk_by_size(clauses, max_statement_size, lambda c: len(c) + 16)
+        ]
+
+    def _partition_size(self, params):
+        # Upper estimate of the characters a partition adds to a batch statement.
+        return sum(len(k) + len(str(v)) + 16 for k, v in self.table.get_current_partition_params(params).items())
+
     def get_delete_from(self, condition=None, params=None, suffix=''):
         raise NotImplemented()
 
+    def get_schema_snapshot(self):
+        """
+        Returns the JSON serializable definition of the table, which the later
+        versions of the table can be evolved from.
+        """
+        return {
+            'table': self.table.table_name,
+            'dialect': self.__class__.__module__,
+            'columns': [
+                {'name': c.name, 'type': c.column_type, 'partition': c.partition}
+                for c in self.table.columns()
+            ],
+        }
+
+    def get_schema_evolution(self, previous, renames=None, suffix=''):
+        """
+        Returns the `SchemaEvolution` from the `previous` definition of the
+        table (a `Table` class, a bound table or a schema snapshot) into the
+        current one. Renamed columns must be listed in `renames` as
+        `{'old_name': 'new_name'}`, otherwise they are dropped and added.
+        Snapshots must be taken of the same table with the same dialect.
+        """
+        if isinstance(previous, dict):
+            if previous.get('table') != self.table.table_name:
+                raise ValueError('The snapshot of {} can not be evolved into {}!'.format(previous.get('table'), self.table.table_name))
+        if isinstance(previous, type):
+            previous = previous(schema=self.table.schema)
+        if isinstance(previous, Table):
+            previous = self.__class__(previous)
+        if isinstance(previous, Dialect):
+            previous = previous.get_schema_snapshot()
+
+        if previous.get('dialect') != self.__class__.__module__:
+            raise NotSupportedDialect('The {} snapshot of {} can not be evolved with {}!'.format(previous.get('dialect'), self.table.table_name, self.__class__.__module__))
+
+        renames = renames or {}
+        previous_columns = {c['name']: c for c in previous['columns']}
+        previous_names = {new_name: old_name for old_name, new_name in renames.items()}
+        for old_name, new_name in renames.items():
+            if old_name not in previous_columns or not self.table.get_column(new_name):
+                raise ColumnNotFound('Renamed column {} -> {} does not exist'.format(old_name, new_name))
+
+        evolution, added_columns = SchemaEvolution(), []
+        for column in self.table.columns():
+            old_name = previous_names.get(column.name, column.name)
+            previous_column = previous_columns.pop(old_name, None)
+            if previous_column is None:
+                if column.partition and not self._partition_evolution:
+                    evolution.rebuild('partition {} is added'.format(column.name))
+                else:
+                    added_columns.append(column)
+                continue
+
+            if previous_column['partition'] != column.partition:
+                evolution.rebuild('column {} is changed to or from a partition'.format(column.name))
+                continue
+
+            if old_name == column.name and previous_column['type'] == column.column_type:
+                continue
+
+            if column.partition and not self._partition_evolution:
+                evolution.rebuild('partition {} is changed'.format(column.name))
+                continue
+
+            statements = self.get_change_column(old_name, previous_column['type'], column, suffix=suffix)
+            if statements is None:
+                evolution.rebuild('column {} can not be changed from {} to {} in place'.format(column.name, previous_column['type'], column.column_type))
+            else:
+                evolution.statements.extend(statements)
+
+        for old_name in previous_columns:
+            evolution.rebuild('column {} is dropped'.format(old_name))
+
+        if added_columns:
+            evolution.statements.extend(self.get_add_columns(added_columns, suffix=suffix))
+            evolution.statements.extend(self._get_move_added_columns(evolution, added_columns, suffix=suffix))
+        return evolution
+
+    def _get_move_added_columns(self, evolution, added_columns, suffix=''):
+        # The added columns are appended, so the ones declared before an existing
+        # column must be moved into place. The partitions are only ordinary
+        # columns in the dialects which can evolve them.
+        columns = self.table.columns(include_partitions=self._partition_evolution)
+        added_names = {c.name for c in added_columns}
+        existing_indexes = [i for i, c in enumerate(columns) if c.name not in added_names]
+        if not existing_indexes:
+            return []
+
+        statements = []
+        for i, column in enumerate(columns[:existing_indexes[-1]]):
+            if column.name not in added_names:
+                continue
+            move = self.get_move_column(column, columns[i - 1].name if i else None, suffix=suffix)
+            if move is None:
+                evolution.rebuild('column {} is added before existing columns'.format(column.name))
+            else:
+                statements.extend(move)
+        return statements
+
+    def get_add_columns(self, columns, suffix=''):
+        raise NotImplemented()
+
+    def get_change_column(self, old_name, old_type, column, suffix=''):
+        """
+        Returns the statements renaming the `old_name` column and changing
+        its `old_type` to match `column`, or None if it is not possible in place.
+        """
+        raise NotImplemented()
+
+    def get_move_column(self, column, after=None, suffix=''):
+        """
+        Returns the statements moving the `column` right after the `after`
+        column (or to the first position), or None if it is not possible in place.
+        """
+        return None
+
     def get_insert_into_from_table(self, source_table_name, filter_fn=None, suffix=''):
         raise NotImplemented()
 
@@ -629,3 +1546,46 @@ class Dialect(object):
             condition=self.table.get_current_partition_condition(condition, ignored_partitions) \
                 .format(**self.table.get_current_partition_params(params))
         )
+
+
+"""
+Schema evolution between the versions of a table
+"""
+
+class SchemaEvolution(object):
+    """
+    The in-place statements evolving a table, and the reasons why the table
+    must be rebuilt instead (if any).
+    """
+    def __init__(self):
+        self.statements = []
+        self.rebuild_reasons = []
+
+    def rebuild(self, reason):
+        self.rebuild_reasons.append(reason)
+
+    @property
+    def requires_rebuild(self):
+        return bool(self.rebuild_reasons)
+
+"""
+Batch statement rendering for whole catalogs
+"""
+
+def render_statements(tables, dialect, schema=None, statements=('create_table',), **kwargs):
+    """
+    Renders the given statements for every table with the selected dialect
+    and yields them one by one, so the memory stays flat for huge catalogs.
+    `tables` can contain `Table` classes (bound to `schema`), `Table` instances
+    or already bound dialect instances. The compiled templates are shared
+    between the tables through the dialect's template cache, and the rendered
+    statements are reused through the rendered cache if one is set.
+    """
+    for table in tables:
+        if isinstance(table, type):
+            table = table(schema=schema)
+        if not isinstance(table, Dialect):
+            table = dialect(table)
+
+        for statement in statements:
+            yield table.render_cached('get_' + statement, **kwargs)
@@ -0,0 +1,271 @@
+"""
+Redshift physical design advisor
+
+Recommends the column encodings, the sort key and the distribution of a
+Redshift table from a per column statistics profile:
+
+    {
+        "row_count": 120000000,
+        "columns": {
+            "user_id": {"cardinality": 2500000, "null_fraction": 0.0, "avg_width": 8, "min": 1, "max": 9000000},
+            "ts": {"cardinality": 86400000, "null_fraction": 0.0, "avg_width": 8, "predicate": true}
+        }
+    }
+
+The optional `predicate` and `join` flags mark the columns used in range
+filters and joins, they are preferred for the sort key and the distribution key.
+"""
+import json
+
+from . import (
+    Boolean,
+    Smallint,
+    Integer,
+    Bigint,
+    Date,
+    Timestamp,
+    Char,
+    Varchar,
+    Sortkey,
+    DistributionKey,
+    DistributionStyle,
+)
+
+# Tables below this row count are copied to every node.
+DIST_ALL_ROW_COUNT = 1000000
+# Below this cardinality a distribution key skews the slices.
+MIN_DISTKEY_CARDINALITY = 10000
+# Rough compressed size / raw size ratios, used for the storage estimates.
+ENCODE_RATIOS = {
+    'RAW': 1.0,
+    'BYTEDICT': None,
+    'DELTA': 0.5,
+    'DELTA32K': 0.6,
+    'LZO': 0.5,
+    'MOSTLY8': None,
+    'MOSTLY16': None,
+    'MOSTLY32': None,
+    'RUNLENGTH': 0.1,
+    'TEXT255': 0.4,
+    'TEXT32K': 0.5,
+    'ZSTD': 0.35,
+}
+INTEGER_WIDTHS = {Smallint: 2, Integer: 4, Bigint: 8}
+MOSTLY_RANGES = (
+    ('MOSTLY8', 1, 2 ** 7),
+    ('MOSTLY16', 2, 2 ** 15),
+    ('MOSTLY32', 4, 2 ** 31),
+)
+
+
+def load_profile(profile):
+    """
+    Returns the profile given as a dict or as the path of a JSON file.
+    """
+    if isinstance(profile, dict):
+        return profile
+
+    with open(profile) as f:
+        return json.load(f)
+
+
+def column_type(column):
+    return column.column.__class__ if column.partition else column.__class__
+
+
+def recommend_encode(column, stats, leading_sortkey=False):
+    """
+    Returns the recommended ENCODE of the column. The leading sort key column
+    is left RAW, so the range restricted scans don't decompress the blocks.
+    """
+    if leading_sortkey:
+        return 'RAW'
+
+    type_cls = column_type(column)
+    cardinality = stats.get('cardinality')
+    if type_cls is Boolean:
+        return 'RUNLENGTH'
+
+    if cardinality is not None and cardinality <= 256 and type_cls not in (Date, Timestamp):
+        return 'BYTEDICT'
+
+    if type_cls in INTEGER_WIDTHS and stats.get('min') is not None and stats.get('max') is not None:
+        width = INTEGER_WIDTHS[type_cls]
+        for encode, mostly_width, limit in MOSTLY_RANGES:
+            if mostly_width < width and -limit <= stats['min'] and stats['max'] < limit:
+                return encode
+
+    return 'ZSTD'
+
+
+def encode_ratio(encode, column, stats):
+    ratio = ENCODE_RATIOS.get(encode.upper(), 1.0)
+    if ratio is not None:
+        return ratio
+
+    width = float(stats.get('avg_width') or INTEGER_WIDTHS.get(column_type(column), 8))
+    if encode.upper() == 'BYTEDICT':
+        return min(1.0, 1 / width)
+    return min(1.0, dict((e, w) for e, w, _ in MOSTLY_RANGES)[encode.upper()] / width)
+
+
+def column_size(column, stats, row_count, encode):
+    """
+    Returns the estimated stored bytes of the column with the given encode.
+    """
+    width = stats.get('avg_width') or INTEGER_WIDTHS.get(column_type(column), 8)
+    values = row_count * (1 - (stats.get('null_fraction') or 0.0))
+    return values * width * encode_ratio(encode or 'RAW', column, stats)
+
+
+def recommend_sortkey(table, profile):
+    """
+    Returns the recommended sort key columns: the predicate columns, or else
+    the Date/Timestamp column with the highest cardinality.
+    """
+    columns = profile.get('columns', {})
+    predicates = [c.name for c in table.columns() if columns.get(c.name, {}).get('predicate')]
+    if predicates:
+        return predicates
+
+    candidates = [
+        c for c in table.columns()
+        if c.name in columns and column_type(c) in (Date, Timestamp)
+    ]
+    if not candidates:
+        return []
+
+    return [max(candidates, key=lambda c: columns[c.name].get('cardinality') or 0).name]
+
+
+def recommend_distribution(table, profile):
+    """
+    Returns the recommended (style, key) pair. Small tables are distributed
+    ALL, big ones by the join column with the highest cardinality, or EVEN
+    if every candidate would skew the slices. Tables of unknown size are
+    never distributed ALL.
+    """
+    row_count = profile.get('row_count')
+    if row_count is not None and row_count < DIST_ALL_ROW_COUNT:
+        return 'ALL', None
+
+    columns = profile.get('columns', {})
+    candidates = [
+        c for c in table.columns()
+        if c.name in columns
+        and (columns[c.name].get('cardinality') or 0) >= MIN_DISTKEY_CARDINALITY
+        and (columns[c.name].get('null_fraction') or 0.0) < 0.1
+        and column_type(c) not in (Boolean, Char)
+    ]
+    joins = [c for c in candidates if columns[c.name].get('join')]
+    candidates = joins or [c for c in candidates if column_type(c) in INTEGER_WIDTHS or column_type(c) is Varchar]
+    if not candidates:
+        return 'EVEN', None
+
+    return 'KEY', max(candidates, key=lambda c: columns[c.name]['cardinality']).name
+
+
+class Advice(object):
+    """
+    Recommendations for a bound `redshift.Table`, with the diff against the
+    current definition, the ALTER statements applying it and the estimated
+    savings.
+    """
+    def __init__(self, dialect, profile):
+        self.dialect = dialect
+        self.profile = load_profile(profile)
+        table = dialect.table
+        columns = self.profile.get('columns', {})
+        row_count = self.profile.get('row_count') or 0
+
+        self.sortkey = recommend_sortkey(table, self.profile)
+        self.diststyle, self.distkey = recommend_distribution(table, self.profile)
+        self.encodes = {
+            c.name: recommend_encode(c, columns[c.name], leading_sortkey=bool(self.sortkey) and c.name == self.sortkey[0])
+            for c in table.columns()
+            if c.name in columns
+        }
+
+        self.storage_before = sum(
+            column_size(c, columns[c.name], row_count, getattr(c, 'encode', None))
+            for c in table.columns() if c.name in columns
+        )
+        self.storage_after = sum(
+            column_size(c, columns[c.name], row_count, self.encodes[c.name])
+            for c in table.columns() if c.name in columns
+        )
+
+    @property
+    def savings(self):
+        """
+        Estimated fraction of the stored bytes saved. The scanned bytes of the
+        full scans shrink by the same fraction, the sort key prunes the range
+        restricted scans further.
+        """
+        if not self.storage_before:
+            return 0.0
+        return 1 - self.storage_after / self.storage_before
+
+    @property
+    def scan_savings(self):
+        """
+        Estimated fraction of the scanned bytes saved by a query filtering on
+        one value of the leading sort key column, as the zone maps skip the
+        blocks of the other values.
+        """
+        if not self.storage_before or not self.sortkey:
+            return self.savings
+
+        cardinality = max(self.profile.get('columns', {}).get(self.sortkey[0], {}).get('cardinality') or 1, 1)
+        before = self.storage_before
+        if self.current_sortkey()[:1] == self.sortkey[:1]:
+            before /= cardinality
+        return 1 - (self.storage_after / cardinality) / before
+
+    def current_sortkey(self):
+        sortkey = self.dialect.table.get_property_by_type(Sortkey)
+        return list(sortkey.attrs['keys']) if sortkey else []
+
+    def current_distribution(self):
+        distkey = self.dialect.table.get_property_by_type(DistributionKey)
+        if distkey:
+            return 'KEY', distkey.attrs['key']
+        diststyle = self.dialect.table.get_property_by_type(DistributionStyle)
+        return (diststyle.attrs['style'].upper() if diststyle else 'AUTO'), None
+
+    def diff(self):
+        """
+        Returns the changes of the table definition as `(name, current, recommended)` tuples.
+        """
+        changes = []
+        for c in self.dialect.table.columns():
+            encode = (getattr(c, 'encode', None) or 'RAW').upper()
+            if c.name in self.encodes and encode != self.encodes[c.name]:
+                changes.append((c.name, encode, self.encodes[c.name]))
+
+        if self.sortkey and self.sortkey != self.current_sortkey():
+            changes.append(('Sortkey', self.current_sortkey(), self.sortkey))
+
+        if (self.diststyle, self.distkey) != self.current_distribution():
+            changes.append(('Distribution', self.current_distribution(), (self.diststyle, self.distkey)))
+
+        return changes
+
+    def get_alter_statements(self, suffix=''):
+        """
+        Returns the ALTER TABLE statements applying the recommendations in place.
+        """
+        table_name = self.dialect.table.full_table_name(quoted=True, with_prefix=True, suffix=suffix)
+        statements = []
+        for name, current, recommended in self.diff():
+            if name == 'Sortkey':
+                statements.append('ALTER TABLE {} ALTER SORTKEY ({});'.format(table_name, ', '.join('"{}"'.format(c) for c in recommended)))
+            elif name == 'Distribution':
+                style, key = recommended
+                if key:
+                    statements.append('ALTER TABLE {} ALTER DISTKEY "{}";'.format(table_name, key))
+                else:
+                    statements.append('ALTER TABLE {} ALTER DISTSTYLE {};'.format(table_name, style))
+            else:
+                statements.append('ALTER TABLE {} ALTER COLUMN "{}" ENCODE {};'.format(table_name, name, recommended))
+        return statements
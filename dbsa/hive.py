@@ -19,10 +19,23 @@ from . import (
     IPAddress,
     Format,
     Bucket,
+    SortedBy,
+    BloomFilter,
+    NotSupportedDialect,
+    TemplateCache,
     Dialect as BaseDialect,
 )
-from jinja2 import Template
-import inspect
+
+# Type changes Hive can apply to the existing data files.
+TYPE_WIDENINGS = {
+    ('TINYINT', 'SMALLINT'),
+    ('TINYINT', 'INT'),
+    ('TINYINT', 'BIGINT'),
+    ('SMALLINT', 'INT'),
+    ('SMALLINT', 'BIGINT'),
+    ('INT', 'BIGINT'),
+    ('FLOAT', 'DOUBLE'),
+}
 
 class Table(BaseDialect):
     _column_types = {
@@ -51,18 +64,50 @@ class Table(BaseDialect):
         Varbinary: {'length'},
         Format: {'format'},
         Bucket: {'by', 'count'},
+        SortedBy: {'by'},
+        BloomFilter: {'columns'},
     }
     _property_types = {
         Format: 'STORED AS {{ format }}',
-        Bucket: 'CLUSTERED BY ({{ by }}) INTO {{ count }} BUCKETS',
+        Bucket: "CLUSTERED BY ({{ by|join(', ') }}){% if sorted_by %} {{ sorted_by }}{% endif %} INTO {{ count }} BUCKETS",
+        SortedBy: 'SORTED BY ({% for c in by %}{{ c }}{% if not loop.last %}, {% endif %}{% endfor %})',
+        BloomFilter: "'orc.bloom.filter.columns'='{{ columns|join(',') }}'{% if fpp %},'orc.bloom.filter.fpp'='{{ fpp }}'{% endif %}",
     }
     _how_to_quote_table = '`{}`'
     _how_to_quote_column = '`{}`'
     _column_setter = '{} {}'
     _sample_value_function = 'MAX({c})'
+    _templates = TemplateCache()
+
+    def get_create_table_properties(self, tblproperties=None):
+        """
+        Returns the properties and the TBLPROPERTIES of the table. Hive sorts
+        within the buckets, so SORTED BY is rendered into CLUSTERED BY, and the
+        bloom filters are table properties.
+        """
+        sorted_by = self.table.get_property_by_type(SortedBy)
+        bloom_filter = self.table.get_property_by_type(BloomFilter)
+        bucket = self.table.get_property_by_type(Bucket)
+        if sorted_by and not bucket:
+            raise NotSupportedDialect('SortedBy requires a Bucket property on Hive')
+
+        properties = []
+        for p in self.table.get_properties():
+            if isinstance(p, (SortedBy, BloomFilter)):
+                continue
+            if p is bucket and sorted_by:
+                properties.append(self._templates.render(self._property_types[Bucket], sorted_by=str(sorted_by), **p.attrs))
+                continue
+            properties.append(str(p))
+
+        if bloom_filter:
+            tblproperties = list(tblproperties or []) + [str(bloom_filter)]
+        return properties, tblproperties
 
     def get_create_table(self, filter_fn=None, external_table=False, hdfs_path=None, tblformat=None, tblproperties=None, suffix=''):
-        return Template("""
+        import inspect
+        properties, tblproperties = self.get_create_table_properties(tblproperties)
+        return self._templates.render("""
             CREATE {% if external_table %}EXTERNAL {% endif %}TABLE IF NOT EXISTS {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} (
               {%- for column in t.columns(filter_fn=filter_fn, include_partitions=False) %}
               {{ column.quoted_name }} {{ column.column_type}}{% if column.comment %} COMMENT '{{ column.comment|replace("'", "`") }}'{% endif %}{% if not loop.last %},{% endif %}
@@ -81,7 +126,7 @@ class Table(BaseDialect):
             {%- if tblformat %}
             {{ tblformat }}
             {%- endif %}
-            {%- for property in t.get_properties() %}
+            {%- for property in properties %}
             {{ property }}{% if not loop.last %},{% endif %}
             {%- endfor %}
             {%- if external_table and hdfs_path %}
@@ -90,29 +135,29 @@ class Table(BaseDialect):
             {%- if tblproperties %}
             TBLPROPERTIES({{ ','.join(tblproperties) }})
             {%- endif %}
-        """).render(t=self.table, filter_fn=filter_fn, external_table=external_table, hdfs_path=hdfs_path, tblformat=tblformat, tblproperties=tblproperties, inspect=inspect, suffix=suffix)
+        """, t=self.table, filter_fn=filter_fn, external_table=external_table, hdfs_path=hdfs_path, tblformat=tblformat, tblproperties=tblproperties, properties=properties, inspect=inspect, suffix=suffix)
 
     def get_drop_table(self, suffix=''):
-        return Template("""
+        return self._templates.render("""
             DROP TABLE IF EXISTS {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} PURGE
-        """).render(t=self.table, suffix=suffix)
+        """, t=self.table, suffix=suffix)
 
     def get_truncate_table(self, suffix=''):
-        return Template("""
+        return self._templates.render("""
             TRUNCATE TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }}
-        """).render(t=self.table, suffix=suffix)
+        """, t=self.table, suffix=suffix)
 
     def get_msck_table(self, suffix=''):
-        return Template("""
+        return self._templates.render("""
             MSCK REPAIR TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }}
-        """).render(t=self.table, suffix=suffix)
+        """, t=self.table, suffix=suffix)
 
     def get_add_current_partition(self, hdfs_path=None, condition='', params=None, ignored_partitions=None, suffix=''):
-        return Template("""
+        return self._templates.render("""
             ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} ADD IF NOT EXISTS PARTITION(
               {{ condition }}
             ) {% if hdfs_path %}LOCATION '{{ hdfs_path }}'{% endif %}
-        """).render(
+        """,
             t=self.table,
             suffix=suffix,
             hdfs_path=hdfs_path,
@@ -121,19 +166,118 @@ class Table(BaseDialect):
         )
 
     def get_delete_current_partition(self, condition='', params=None, ignored_partitions=None, suffix=''):
-        return Template("""
+        return self._templates.render("""
             ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix='') }} DROP IF EXISTS PARTITION(
               {{ condition }}
             ) PURGE
-        """).render(
+        """,
             t=self.table,
             suffix=suffix,
             condition=self.table.get_current_partition_condition(condition, ignored_partitions, sep=', ') \
                 .format(**self.table.get_current_partition_params(params))
         )
 
+    def get_delete_partitions_before(self, condition='', params=None, ignored_partitions=None, suffix=''):
+        """
+        Returns the statement dropping every partition older than the current
+        one. DROP PARTITION can not express the ordering of more than one
+        partition column, the others must be ignored.
+        """
+        ignored_partitions = set(ignored_partitions or [])
+        if len([p for p in self.table.partitions if p.name not in ignored_partitions]) != 1:
+            raise ValueError('{} - exactly one partition column can be compared, ignore the others!'.format(self.table.table_name))
+
+        return self._templates.render("""
+            ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} DROP IF EXISTS PARTITION(
+              {{ condition }}
+            ) PURGE
+        """,
+            t=self.table,
+            suffix=suffix,
+            condition=self.table.get_current_partition_condition(condition, ignored_partitions, sep=', ', operator='<') \
+                .format(**self.table.get_current_partition_params(params))
+        )
+
+    def get_add_partitions(self, partitions, hdfs_path=None, ignored_partitions=None, suffix='', max_statement_size=None):
+        """
+        Returns the statements adding every partition value dict, as few
+        `ALTER TABLE ... ADD` statements as `max_statement_size` allows. The
+        partitions are located under `hdfs_path` if it is given.
+        """
+        condition = self._get_partition_clause_condition(ignored_partitions)
+        locations = self.get_partition_locations(partitions, hdfs_path) if hdfs_path else [None] * len(partitions)
+        clauses = [
+            "PARTITION({}){}".format(
+                condition.format(**self.table.get_current_partition_params(params)),
+                " LOCATION '{}'".format(location) if location else '',
+            )
+            for params, location in zip(partitions, locations)
+        ]
+        return self._batch_statements("""
+            ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} ADD IF NOT EXISTS
+              {%- for clause in clauses %}
+              {{ clause }}
+              {%- endfor %}
+            """, clauses, max_statement_size, t=self.table, suffix=suffix)
+
+    def get_delete_partitions(self, partitions, ignored_partitions=None, suffix='', max_statement_size=None):
+        condition = self._get_partition_clause_condition(ignored_partitions)
+        clauses = [
+            'PARTITION({})'.format(condition.format(**self.table.get_current_partition_params(params)))
+            for params in partitions
+        ]
+        return self._batch_statements("""
+            ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} DROP IF EXISTS
+              {%- for clause in clauses %}
+              {{ clause }}{% if not loop.last %},{% endif %}
+              {%- endfor %}
+            PURGE
+            """, clauses, max_statement_size, t=self.table, suffix=suffix)
+
+    def get_analyze_current_partition(self, params=None, ignored_partitions=None, suffix=''):
+        """
+        Returns the column statistics computation of the current partition,
+        the ignored partitions and the ones without a value are analyzed for
+        every value.
+        """
+        partition_params = self.table.get_current_partition_params(params)
+        ignored_partitions = set(ignored_partitions or []) | {p.name for p in self.table.partitions if p.name not in partition_params}
+        return self._templates.render("""
+            ANALYZE TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }}
+            {%- if t.partitions %}
+            PARTITION(
+              {%- for p in t.partitions %}
+              {{ p.quoted_name }}{% if p.name not in ignored_partitions %} = {{ partition_params[p.name] }}{% endif %}{% if not loop.last %},{% endif %}
+              {%- endfor %}
+            )
+            {%- endif %}
+            COMPUTE STATISTICS FOR COLUMNS
+        """, t=self.table, suffix=suffix, partition_params=partition_params, ignored_partitions=ignored_partitions)
+
+    def get_add_columns(self, columns, suffix=''):
+        return [self._templates.render("""
+            ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} ADD COLUMNS (
+              {%- for column in columns %}
+              {{ column.quoted_name }} {{ column.column_type }}{% if column.comment %} COMMENT '{{ column.comment|replace("'", "`") }}'{% endif %}{% if not loop.last %},{% endif %}
+              {%- endfor %}
+            ) CASCADE
+        """, t=self.table, columns=columns, suffix=suffix)]
+
+    def get_change_column(self, old_name, old_type, column, suffix=''):
+        if old_type != column.column_type and (old_type, column.column_type) not in TYPE_WIDENINGS:
+            return None
+
+        return [self._templates.render("""
+            ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} CHANGE COLUMN {{ old_name }} {{ column.quoted_name }} {{ column.column_type }}{% if column.comment %} COMMENT '{{ column.comment|replace("'", "`") }}'{% endif %} CASCADE
+        """, t=self.table, column=column, old_name=self._how_to_quote_column.format(old_name), suffix=suffix)]
+
+    def get_move_column(self, column, after=None, suffix=''):
+        return [self._templates.render("""
+            ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} CHANGE COLUMN {{ column.quoted_name }} {{ column.quoted_name }} {{ column.column_type }}{% if column.comment %} COMMENT '{{ column.comment|replace("'", "`") }}'{% endif %} {% if after %}AFTER {{ after }}{% else %}FIRST{% endif %} CASCADE
+        """, t=self.table, column=column, after=after and self._how_to_quote_column.format(after), suffix=suffix)]
+
     def get_select(self, filter_fn=None, suffix='', condition='', transforms=None, limit=None):
-        return Template("""
+        return self._templates.render("""
             SELECT
               {%- for column in t.columns(filter_fn=filter_fn) %}
               {% if tf[column.name] %}{{ tf[column.name].format(c=column.quoted_name) }} AS {{ column.quoted_name }}{% else %}{{ column.quoted_name }}{% endif %}{% if not loop.last %},{% endif %}
@@ -145,19 +289,48 @@ class Table(BaseDialect):
             {%- if limit %}
             LIMIT {{ limit }}
             {%- endif %}
-        """).render(t=self.table, limit=limit, filter_fn=filter_fn, suffix=suffix, condition=condition, tf=transforms or {})
+        """, t=self.table, limit=limit, filter_fn=filter_fn, suffix=suffix, condition=condition, tf=transforms or {})
 
     def get_insert_into_from_table(self, source_table_name, filter_fn=None, suffix=''):
         return self.get_insert_into_via_select(select=source_table_name, filter_fn=filter_fn, embed_select=False, suffix=suffix)
 
-    def get_insert_into_via_select(self, select, filter_fn=None, embed_select=True, suffix=''):
+    def get_dynamic_partition_settings(self, max_partitions=None, max_partitions_per_node=None):
+        settings = [
+            'SET hive.exec.dynamic.partition=true',
+            'SET hive.exec.dynamic.partition.mode=nonstrict',
+        ]
+        if max_partitions:
+            settings.append('SET hive.exec.max.dynamic.partitions={}'.format(max_partitions))
+        if max_partitions_per_node:
+            settings.append('SET hive.exec.max.dynamic.partitions.pernode={}'.format(max_partitions_per_node))
+        return settings
+
+    def get_distribute_by(self, salt_buckets=None, filter_fn=None, salt_columns=None):
+        """
+        Returns the DISTRIBUTE BY expressions of the dynamic partitions, so
+        every reducer writes one file per partition. `salt_buckets` spreads a
+        partition over that many reducers (and files) by the hash of the
+        inserted columns (or `salt_columns`), so retried tasks send every row
+        to the same reducer.
+        """
+        expressions = [p.quoted_name for p in self.table.partitions if not p.value]
+        if expressions and salt_buckets:
+            if salt_columns is None:
+                salt_columns = [c.quoted_name for c in self.table.columns(include_partitions=False, filter_fn=filter_fn)]
+            expressions.append('PMOD(HASH({}), {})'.format(', '.join(salt_columns), salt_buckets))
+        return expressions
+
+    def get_insert_into_via_select(self, select, filter_fn=None, embed_select=True, suffix='', dynamic_partitions=False, max_partitions=None, max_partitions_per_node=None, salt_buckets=None):
         ignore_const_partitions_fn = lambda x: (x.partition and not x.value) or not x.partition
         if filter_fn:
             combined_fn = lambda x: filter_fn(x) and ignore_const_partitions_fn(x)
         else:
             combined_fn = ignore_const_partitions_fn
 
-        return Template("""
+        return self._templates.render("""
+            {%- for setting in settings %}
+            {{ setting }};
+            {%- endfor %}
             INSERT INTO {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }}
             {%- if t.partitions %}
             PARTITION (
@@ -175,11 +348,25 @@ class Table(BaseDialect):
               {%- for column_value in t.column_values(include_partitions=True, filter_fn=filter_fn) %}
               {{ column_value }}{% if not loop.last %},{% endif %}
               {%- endfor %}
-            FROM {{ select.strip() if not embed_select else '({}) vw'.format(select.strip()) }}
-        """).render(t=self.table, filter_fn=combined_fn, select=select, embed_select=embed_select, suffix=suffix)
+            FROM {{ select.strip() if not embed_select and not distribute_by else '({}) vw'.format(select.strip().strip(';') if embed_select else 'SELECT * FROM ' + select.strip()) }}
+            {%- if distribute_by %}
+            DISTRIBUTE BY {{ distribute_by | join(', ') }}
+            {%- endif %}
+        """,
+            t=self.table,
+            filter_fn=combined_fn,
+            select=select,
+            embed_select=embed_select,
+            suffix=suffix,
+            settings=self.get_dynamic_partition_settings(max_partitions, max_partitions_per_node) if dynamic_partitions else [],
+            distribute_by=self.get_distribute_by(salt_buckets, filter_fn) if dynamic_partitions else [],
+        )
 
-    def get_insert_overwrite_via_select(self, select, suffix=''):
-        return Template("""
+    def get_insert_overwrite_via_select(self, select, suffix='', dynamic_partitions=False, max_partitions=None, max_partitions_per_node=None, salt_buckets=None):
+        return self._templates.render("""
+            {%- for setting in settings %}
+            {{ setting }};
+            {%- endfor %}
             INSERT OVERWRITE TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }}
             {%- if t.partitions %}
             PARTITION (
@@ -188,19 +375,66 @@ class Table(BaseDialect):
               {%- endfor %}
             )
             {%- endif %}
+            {%- if distribute_by %}
+            SELECT * FROM ({{ select.strip().strip(';') }}) vw
+            {%- else %}
             {{ select }}
-        """).render(t=self.table, select=select, suffix=suffix)
+            {%- endif %}
+            {%- if distribute_by %}
+            DISTRIBUTE BY {{ distribute_by | join(', ') }}
+            {%- endif %}
+        """,
+            t=self.table,
+            select=select,
+            suffix=suffix,
+            settings=self.get_dynamic_partition_settings(max_partitions, max_partitions_per_node) if dynamic_partitions else [],
+            # The columns of the select are not known, every one of them is hashed.
+            distribute_by=self.get_distribute_by(salt_buckets, salt_columns=['*']) if dynamic_partitions else [],
+        )
+
+    def get_merge(self, select, primary_keys, filter_fn=None, embed_select=True, suffix=''):
+        """
+        Returns a single MERGE into the ACID table updating the matching rows
+        and inserting the new ones of `select`. Hive inserts every column in
+        table order, so the columns skipped by `filter_fn` are inserted as NULL.
+        """
+        filter_fn = filter_fn or (lambda c: True)
+        return self._templates.render("""
+            MERGE INTO {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} AS t
+            USING {{ select if not embed_select else '({})'.format(select.strip().strip(';')) }} AS s
+            ON {{ condition }}
+            {%- if updated_columns %}
+            WHEN MATCHED THEN UPDATE SET
+              {%- for column in updated_columns %}
+              {{ column.quoted_name }} = {{ column.load_value('s') }}{% if not loop.last %},{% endif %}
+              {%- endfor %}
+            {%- endif %}
+            WHEN NOT MATCHED THEN INSERT VALUES (
+              {%- for column in columns %}
+              {{ column.load_value('s') if filter_fn(column) else 'NULL' }}{% if not loop.last %},{% endif %}
+              {%- endfor %}
+            )
+        """,
+            t=self.table,
+            select=select,
+            embed_select=embed_select,
+            suffix=suffix,
+            filter_fn=filter_fn,
+            condition=self.get_merge_condition(primary_keys),
+            columns=list(self.table.non_partitions) + list(self.table.partitions),
+            updated_columns=self.table.columns(include_partitions=False, filter_fn=lambda c: c.name not in primary_keys and filter_fn(c)),
+        )
 
     def get_drop_current_partition_view(self, suffix='_latest'):
-        return Template("""
+        return self._templates.render("""
             DROP VIEW IF EXISTS {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }}
-        """).render(t=self.table, suffix=suffix)
+        """, t=self.table, suffix=suffix)
 
     def get_create_current_partition_view(self, suffix='_latest', condition='', ignored_partitions=None, params=None, transforms=None):
-        return Template("""
+        return self._templates.render("""
             CREATE OR REPLACE VIEW {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} AS
             {{ select }}
-        """).render(
+        """,
             t=self.table,
             select=self.get_select_current_partition(condition=condition, ignored_partitions=ignored_partitions, params=params, transforms=transforms),
             suffix=suffix,
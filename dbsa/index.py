@@ -0,0 +1,15 @@
+import sys
+import dbsa
+import argparse
+
+def main(argv=sys.argv):
+    parser = argparse.ArgumentParser(description='Builds the table index used by dbsa.registry to import schema modules lazily.')
+    parser.add_argument('output')
+    parser.add_argument('modules', nargs='+', help='Importable module names, e.g. airflow.schemas.default')
+    args = parser.parse_args()
+
+    index = dbsa.registry.build_index(args.modules, args.output)
+    print('{} tables indexed in {}'.format(len(index), args.output))
+
+if __name__ == '__main__':
+    main()
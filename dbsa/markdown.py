@@ -1,38 +1,178 @@
 import os
 import sys
 import dbsa
+import json
+import time
+import hashlib
 import inspect
 import argparse
 import importlib
+from concurrent.futures import ProcessPoolExecutor
+
+def add_import_paths(paths_to_import):
+    for pathname in paths_to_import:
+        if pathname not in sys.path:
+            sys.path.append(pathname)
+
+def render_module(dialect, module_name, level, reload=False):
+    dialect_module = importlib.import_module('dbsa.' + dialect)
+    module = importlib.import_module(module_name)
+    if reload:
+        module = importlib.reload(module)
+
+    lines = [(level+1) * '#' + ' ' + module_name, module.__doc__ or '']
+    for cls_name, cls in inspect.getmembers(module, inspect.isclass):
+        if not issubclass(cls, dbsa.Table) or cls_name.startswith('__'): continue
+        lines.append(dialect_module.Table(cls(schema=module_name)).to_markdown(header='#'*(level+2)))
+
+    return '\n'.join(lines)
+
+def render_modules(dialect, module_names, level, paths_to_import, jobs=1, reload=False):
+    if jobs <= 1:
+        add_import_paths(paths_to_import)
+        for module_name in module_names:
+            yield module_name, render_module(dialect, module_name, level, reload)
+        return
+
+    # Executor.map keeps the order of the modules, so the output is
+    # deterministic regardless of which worker finishes first.
+    with ProcessPoolExecutor(max_workers=jobs, initializer=add_import_paths, initargs=(paths_to_import,)) as executor:
+        rendered_modules = executor.map(
+            render_module,
+            [dialect] * len(module_names),
+            module_names,
+            [level] * len(module_names),
+        )
+        for module_name, rendered_module in zip(module_names, rendered_modules):
+            yield module_name, rendered_module
+
+def module_cache_key(dialect, level, module_path):
+    with open(module_path, 'rb') as f:
+        source = f.read()
+
+    key = hashlib.sha256('{}:{}:{}:'.format(dbsa.__version__, dialect, level).encode('utf-8'))
+    key.update(source)
+    return key.hexdigest()
+
+def load_cache(cache_path):
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except ValueError:
+        return {}
+
+def save_cache(cache_path, cache):
+    if not cache_path:
+        return
+
+    with open(cache_path + '.tmp', 'w') as f:
+        json.dump(cache, f)
+    os.replace(cache_path + '.tmp', cache_path)
+
+def update_modules(dialect, modules, level, paths_to_import, cache, jobs=1, reload=False):
+    """
+    Renders the modules whose source changed since the cached rendering and
+    returns their names. Unchanged modules keep their cached markdown, the
+    modules that can not be read (e.g. moved away while watching) are skipped.
+    """
+    keys = {}
+    for module_name, module_path in modules:
+        try:
+            keys[module_name] = module_cache_key(dialect, level, module_path)
+        except OSError:
+            continue
+
+    stale_module_names = [
+        module_name
+        for module_name, module_path in modules
+        if module_name in keys and cache.get(module_name, {}).get('key') != keys[module_name]
+    ]
+
+    for module_name, rendered_module in render_modules(dialect, stale_module_names, level, paths_to_import, jobs, reload):
+        cache[module_name] = {'key': keys[module_name], 'markdown': rendered_module}
+
+    return stale_module_names
+
+def write_modules(modules, level, cache, output=None, module_names=None):
+    if not output:
+        if level == 1:
+            print('# Schema documentation')
+        for module_name, module_path in modules:
+            if module_name in cache:
+                print(cache[module_name]['markdown'])
+        return
+
+    for module_name, module_path in modules:
+        if module_name not in cache:
+            continue
+
+        output_path = os.path.join(output, module_name + '.md')
+        if module_names is not None and module_name not in module_names and os.path.exists(output_path):
+            continue
+
+        with open(output_path, 'w') as f:
+            f.write(cache[module_name]['markdown'] + '\n')
+
+def get_mtimes(modules):
+    # Missing modules have no mtime, they are re-rendered once they come back.
+    mtimes = {}
+    for module_name, module_path in modules:
+        try:
+            mtimes[module_name] = os.path.getmtime(module_path)
+        except OSError:
+            mtimes[module_name] = None
+    return mtimes
 
 def main(argv=sys.argv):
     parser = argparse.ArgumentParser()
     parser.add_argument('dialect')
     parser.add_argument('modules', nargs='+')
     parser.add_argument('--ns', action='store_true')
+    parser.add_argument('--jobs', type=int, default=1, help='Number of processes used to render the modules.')
+    parser.add_argument('--output', help='Directory to write one markdown file per module instead of stdout.')
+    parser.add_argument('--cache', help='JSON file to reuse the markdown of unchanged modules between runs.')
+    parser.add_argument('--watch', action='store_true', help='Keep polling the modules and re-render the changed ones.')
+    parser.add_argument('--interval', type=float, default=1.0, help='Polling interval of --watch in seconds.')
     args = parser.parse_args()
 
-    dialect_module = importlib.import_module('dbsa.' + args.dialect)
-
-    module_names, paths_to_import, moduls = [], set(), []
+    modules, paths_to_import = [], []
     for module_path in args.modules:
         pathname, filename = os.path.split(module_path)
-        paths_to_import.add(os.path.abspath(pathname))
+        if os.path.abspath(pathname) not in paths_to_import:
+            paths_to_import.append(os.path.abspath(pathname))
         module_name = os.path.splitext(filename)[0]
-        if module_name: module_names.append(module_name)
-
-    for pathname in paths_to_import:
-        sys.path.append(pathname)
+        if module_name and not module_name.startswith('__'): modules.append((module_name, module_path))
 
     level = 0 if args.ns is True else 1
-    if level == 1:
-        print('# Schema documentation')
-
-    for module_name in module_names:
-        if module_name.startswith('__'): continue
-        module = importlib.import_module(module_name)
-        print((level+1) * '#' + ' ' + module_name)
-        print(module.__doc__ or '')
-        for cls_name, cls in inspect.getmembers(module, inspect.isclass):
-            if not issubclass(cls, dbsa.Table) or cls_name.startswith('__'): continue
-            print(dialect_module.Table(cls(schema=module_name)).to_markdown(header='#'*(level+2)))
+    if args.output and not os.path.isdir(args.output):
+        os.makedirs(args.output)
+
+    cache = load_cache(args.cache)
+    module_names = update_modules(args.dialect, modules, level, paths_to_import, cache, args.jobs)
+    save_cache(args.cache, cache)
+    write_modules(modules, level, cache, args.output, module_names)
+
+    if not args.watch:
+        return
+
+    mtimes = get_mtimes(modules)
+    try:
+        while True:
+            time.sleep(args.interval)
+            current_mtimes = get_mtimes(modules)
+            changed_modules = [(n, p) for n, p in modules if current_mtimes[n] is not None and current_mtimes[n] != mtimes[n]]
+            mtimes = current_mtimes
+            if not changed_modules:
+                continue
+
+            module_names = update_modules(args.dialect, changed_modules, level, paths_to_import, cache, args.jobs, reload=True)
+            if not module_names:
+                continue
+
+            save_cache(args.cache, cache)
+            write_modules(modules, level, cache, args.output, module_names)
+    except KeyboardInterrupt:
+        pass
@@ -20,10 +20,100 @@ from . import (
     IPAddress,
     Format,
     Bucket,
+    SortedBy,
+    BloomFilter,
+    TemplateCache,
     Dialect as BaseDialect,
 )
-from jinja2 import Template
-import inspect
+
+UPSERT_STRATEGIES = {
+    'not_exists': """
+            WITH incremental_update AS (
+                {{ update_select }}
+            )
+            SELECT 
+              {%- for column_value in t.column_values(filter_fn=filter_fn) %}
+              {{ column_value }}{% if not loop.last %},{% endif %}
+              {%- endfor %}
+            FROM incremental_update
+            UNION ALL
+            SELECT 
+              {%- for column_value in t.column_values(filter_fn=filter_fn) %}
+              {{ column_value }}{% if not loop.last %},{% endif %}
+              {%- endfor %}
+            FROM {{ '({}) AS d'.format(select) }}
+            {%- if t.column_values(filter_fn=primary_keys_fn) | list %}
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM incremental_update AS u
+                WHERE 
+                  {%- for pk in t.column_values(filter_fn=primary_keys_fn) %}
+                  {% if not loop.first %}AND {% endif %}u.{{ pk }} = d.{{ pk }}
+                  {%- endfor %}
+            )
+            {%- endif %}
+        """,
+    'left_join': """
+            WITH incremental_update AS (
+                {{ update_select }}
+            )
+            SELECT 
+              {%- for column_value in t.column_values(filter_fn=filter_fn) %}
+              {{ column_value }}{% if not loop.last %},{% endif %}
+              {%- endfor %}
+            FROM incremental_update
+            UNION ALL
+            SELECT 
+              {%- for column in t.columns(filter_fn=filter_fn) %}
+              {{ column._column_setter.format(column.load_value('d'), column.quoted_name) }}{% if not loop.last %},{% endif %}
+              {%- endfor %}
+            FROM {{ '({}) AS d'.format(select) }}
+            {%- if t.column_values(filter_fn=primary_keys_fn) | list %}
+            LEFT JOIN incremental_update AS u ON
+              {%- for pk in t.column_values(filter_fn=primary_keys_fn) %}
+              {% if not loop.first %}AND {% endif %}u.{{ pk }} = d.{{ pk }}
+              {%- endfor %}
+            WHERE
+              {%- for pk in t.column_values(filter_fn=primary_keys_fn) %}
+              {% if not loop.first %}AND {% endif %}u.{{ pk }} IS NULL
+              {%- endfor %}
+            {%- endif %}
+        """,
+    'row_number': """
+            WITH incremental_update AS (
+                {{ update_select }}
+            )
+            SELECT 
+              {%- for column in t.columns(filter_fn=filter_fn) %}
+              {{ column.quoted_name }}{% if not loop.last %},{% endif %}
+              {%- endfor %}
+            FROM (
+                SELECT
+                  *,
+                  {%- if t.column_values(filter_fn=primary_keys_fn) | list %}
+                  ROW_NUMBER() OVER (PARTITION BY {% for pk in t.columns(filter_fn=primary_keys_fn) %}{{ pk.quoted_name }}{% if not loop.last %}, {% endif %}{% endfor %} ORDER BY upsert_priority) AS upsert_row_number
+                  {%- else %}
+                  1 AS upsert_row_number
+                  {%- endif %}
+                FROM (
+                    SELECT 
+                      {%- for column_value in t.column_values(filter_fn=filter_fn) %}
+                      {{ column_value }},
+                      {%- endfor %}
+                      0 AS upsert_priority
+                    FROM incremental_update
+                    UNION ALL
+                    SELECT 
+                      {%- for column_value in t.column_values(filter_fn=filter_fn) %}
+                      {{ column_value }},
+                      {%- endfor %}
+                      1 AS upsert_priority
+                    FROM {{ '({}) AS d'.format(select) }}
+                ) AS c
+            ) AS r
+            WHERE upsert_row_number = 1
+        """,
+}
 
 class Table(BaseDialect):
     _column_types = {
@@ -53,31 +143,35 @@ class Table(BaseDialect):
         Varbinary: {'length'},
         Format: {'format'},
         Bucket: {'by', 'count'},
+        SortedBy: {'by'},
+        BloomFilter: {'columns'},
     }
     _property_types = {
         Format: "format = '{{ format }}'",
         Bucket: "bucketed_by = ARRAY[{% for c in by %}'{{ c }}'{% if not loop.last %}, {% endif %}{% endfor %}], bucket_count = {{ count }}",
+        SortedBy: "sorted_by = ARRAY[{% for c in by %}'{{ c }}'{% if not loop.last %}, {% endif %}{% endfor %}]",
+        BloomFilter: "orc_bloom_filter_columns = ARRAY[{% for c in columns %}'{{ c }}'{% if not loop.last %}, {% endif %}{% endfor %}]{% if fpp %}, orc_bloom_filter_fpp = {{ fpp }}{% endif %}",
     }
     _how_to_quote_table = '"{}"'
     _how_to_quote_column = '"{}"'
     _column_setter = '{} AS {}'
     _sample_value_function = 'ARBITRARY({c})'
+    _templates = TemplateCache()
+    _upsert_strategies = UPSERT_STRATEGIES
 
     def columns(self, include_partitions=True, filter_fn=None):
-        columns = self.table._columns if not filter_fn else filter(filter_fn, self.table._columns)
-        kept_partitions = []
-        for c in columns:
-            if not c.partition:
+        for c in self.table.non_partitions:
+            if not filter_fn or filter_fn(c):
                 yield c
-            else:
-                kept_partitions.append(c)
 
         if include_partitions:
-            for c in kept_partitions:
-                yield c
+            for c in self.table.partitions:
+                if not filter_fn or filter_fn(c):
+                    yield c
 
     def get_create_table(self, filter_fn=None, suffix=''):
-        return Template("""
+        import inspect
+        return self._templates.render("""
             CREATE TABLE IF NOT EXISTS {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} (
               {%- for column in d.columns(filter_fn=filter_fn) %}
               {{ column.quoted_name }} {{ column.column_type}}{% if column.comment %} COMMENT '{{ column.comment|replace("'", "''") }}'{% endif %}{% if not loop.last %},{% endif %}
@@ -100,28 +194,60 @@ class Table(BaseDialect):
               {%- endfor %}
             )
             {%- endif %}
-        """).render(t=self.table, d=self, filter_fn=filter_fn, inspect=inspect, suffix=suffix)
+        """, t=self.table, d=self, filter_fn=filter_fn, inspect=inspect, suffix=suffix)
 
     def get_drop_table(self, suffix=''):
-        return Template("""
+        return self._templates.render("""
             DROP TABLE IF EXISTS {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }}
-        """).render(t=self.table, suffix=suffix)
+        """, t=self.table, suffix=suffix)
 
     def get_truncate_table(self, suffix=''):
-        return Template("""
+        return self._templates.render("""
             TRUNCATE TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }}
-        """).render(t=self.table, suffix=suffix)
+        """, t=self.table, suffix=suffix)
 
     def get_delete_from(self, condition=None, params=None, suffix=''):
-        return Template("""
+        return self._templates.render("""
             DELETE FROM {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }}
             {%- if condition %}
             WHERE {{ condition }}
             {%- endif %}
-        """).render(t=self.table, suffix=suffix, condition=condition).format(**(params or {}))
+        """, t=self.table, suffix=suffix, condition=condition).format(**(params or {}))
+
+    def get_analyze_current_partition(self, params=None, ignored_partitions=None, suffix=''):
+        """
+        Returns the statistics collection of the current partition. The
+        partitions can only be listed with every value, so the whole table is
+        analyzed if a partition is ignored or has no value.
+        """
+        ignored_partitions = set(ignored_partitions or [])
+        partition_params = self.table.get_current_partition_params(params)
+        analyze_partition = all(p.name in partition_params and p.name not in ignored_partitions for p in self.table.partitions)
+        return self._templates.render("""
+            ANALYZE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }}
+            {%- if t.partitions and analyze_partition %}
+            WITH (partitions = ARRAY[ARRAY[{% for p in t.partitions %}{{ partition_params[p.name] }}{% if not loop.last %}, {% endif %}{% endfor %}]])
+            {%- endif %}
+        """, t=self.table, suffix=suffix, partition_params=partition_params, analyze_partition=analyze_partition)
+
+    def get_add_columns(self, columns, suffix=''):
+        return [
+            self._templates.render("""
+            ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} ADD COLUMN {{ column.quoted_name }} {{ column.column_type }}{% if column.comment %} COMMENT '{{ column.comment|replace("'", "''") }}'{% endif %}
+        """, t=self.table, column=column, suffix=suffix)
+            for column in columns
+        ]
+
+    def get_change_column(self, old_name, old_type, column, suffix=''):
+        if old_type != column.column_type:
+            return None
+
+        return [self._templates.render("""
+            ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} RENAME COLUMN {{ old_name }} TO {{ column.quoted_name }}
+        """, t=self.table, column=column, old_name=self._how_to_quote_column.format(old_name), suffix=suffix)]
 
     def get_select(self, filter_fn=None, suffix='', condition='', transforms=None, limit=None):
-        return Template("""
+        return self._templates.render("""
             SELECT
               {%- for column in t.columns(filter_fn=filter_fn) %}
               {% if tf[column.name] %}{{ tf[column.name].format(c=column.quoted_name) }} AS {{ column.quoted_name }}{% else %}{{ column.quoted_name }}{% endif %}{% if not loop.last %},{% endif %}
@@ -133,13 +259,13 @@ class Table(BaseDialect):
             {%- if limit %}
             LIMIT {{ limit }}
             {%- endif %}
-        """).render(t=self.table, limit=limit, filter_fn=filter_fn, suffix=suffix, condition=condition, tf=transforms or {})
+        """, t=self.table, limit=limit, filter_fn=filter_fn, suffix=suffix, condition=condition, tf=transforms or {})
 
     def get_insert_into_from_table(self, source_table_name, filter_fn=None, suffix=''):
         return self.get_insert_into_via_select(select=source_table_name, filter_fn=filter_fn, embed_select=False, suffix=suffix)
 
     def get_insert_into_via_select(self, select, filter_fn=None, embed_select=True, suffix=''):
-        return Template("""
+        return self._templates.render("""
             INSERT INTO {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} (
               {%- for column in t.columns(filter_fn=filter_fn) %}
               {{ column.quoted_name }}{% if not loop.last %},{% endif %}
@@ -150,52 +276,38 @@ class Table(BaseDialect):
               {{ column_value }}{% if not loop.last %},{% endif %}
               {%- endfor %}
             FROM {{ select if not embed_select else '({}) AS vw'.format(select) }}
-        """).render(t=self.table, select=select, filter_fn=filter_fn, embed_select=embed_select, suffix=suffix)
+        """, t=self.table, select=select, filter_fn=filter_fn, embed_select=embed_select, suffix=suffix)
 
     def get_drop_current_partition_view(self, suffix='_latest'):
-        return Template("""
+        return self._templates.render("""
             DROP VIEW IF EXISTS {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }}
-        """).render(t=self.table, suffix=suffix)
+        """, t=self.table, suffix=suffix)
 
     def get_create_current_partition_view(self, suffix='_latest', condition='', ignored_partitions=None, params=None, transforms=None, security_invoker=False):
-        return Template("""
+        return self._templates.render("""
             CREATE OR REPLACE VIEW {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }}{%- if security_invoker %} SECURITY INVOKER{%- endif %} AS
             {{ select }}
-        """).render(
+        """,
             t=self.table,
             select=self.get_select_current_partition(condition=condition, ignored_partitions=ignored_partitions, params=params, transforms=transforms),
             suffix=suffix,
             security_invoker=security_invoker
         )
 
-    def get_upsert_select(self, update_select, primary_keys=None, filter_fn=None, condition='', ignored_partitions=None, params=None, transforms=None):
-        filter_fn = filter_fn or (lambda x: x.name not in map(lambda y: y.name, self.partitions))
-        return Template("""
-            WITH incremental_update AS (
-                {{ update_select }}
-            )
-            SELECT 
-              {%- for column_value in t.column_values(filter_fn=filter_fn) %}
-              {{ column_value }}{% if not loop.last %},{% endif %}
-              {%- endfor %}
-            FROM incremental_update
-            UNION ALL
-            SELECT 
-              {%- for column_value in t.column_values(filter_fn=filter_fn) %}
-              {{ column_value }}{% if not loop.last %},{% endif %}
-              {%- endfor %}
-            FROM {{ '({}) AS d'.format(select) }}
-            {%- if t.column_values(filter_fn=primary_keys_fn) | list %}
-            WHERE NOT EXISTS (
-                SELECT 1
-                FROM incremental_update AS u
-                WHERE 
-                  {%- for pk in t.column_values(filter_fn=primary_keys_fn) %}
-                  {% if not loop.first %}AND {% endif %}u.{{ pk }} = d.{{ pk }}
-                  {%- endfor %}
-            )
-            {%- endif %}
-        """).render(
+    def get_upsert_select(self, update_select, primary_keys=None, filter_fn=None, condition='', ignored_partitions=None, params=None, transforms=None, strategy='not_exists'):
+        """
+        Returns the current partition updated with `update_select`. The rows of
+        the current partition matching an update on the primary keys are left
+        out according to the `strategy`:
+        - `not_exists`: a correlated `WHERE NOT EXISTS` anti-join,
+        - `left_join`: a `LEFT JOIN ... IS NULL` anti-join,
+        - `row_number`: a `UNION ALL` deduplicated with `ROW_NUMBER()`, preferring the updates.
+        """
+        if strategy not in self._upsert_strategies:
+            raise ValueError('Not supported upsert strategy: {}'.format(strategy))
+
+        filter_fn = filter_fn or (lambda x: not x.partition)
+        return self._templates.render(self._upsert_strategies[strategy],
             t=self.table,
             select=self.get_select_current_partition(
                 condition=condition,
@@ -15,13 +15,39 @@ from . import (
     DistributionKey,
     DistributionStyle,
     cleanup_fn,
+    TemplateCache,
     Dialect as BaseDialect,
 )
-from jinja2 import Template
+import os
 import json
 
 COLUMN_ENCODE = ['BYTEDICT', 'DELTA', 'DELTA32K', 'LZO', 'MOSTLY8', 'MOSTLY16', 'MOSTLY32', 'RAW', 'RUNLENGTH', 'TEXT255', 'TEXT32K', 'ZSTD']
 
+COMPRESSIONS = {
+    'gzip': '.gz',
+    'bzip2': '.bz2',
+    'zstd': '.zst',
+}
+
+def open_compressed(path, compression):
+    if not compression:
+        return open(path, 'w', newline='')
+    if compression == 'gzip':
+        import gzip
+        return gzip.open(path, 'wt', newline='')
+    if compression == 'bzip2':
+        import bz2
+        return bz2.open(path, 'wt', newline='')
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError('zstd compression requires the zstandard package, install it with `pip install dbsa[zstd]`')
+        return zstandard.open(path, 'wt', newline='')
+    raise ValueError('Not supported compression: {}'.format(compression))
+
+VACUUM_MODES = ('FULL', 'SORT ONLY', 'DELETE ONLY', 'REINDEX')
+
 class Table(BaseDialect):
     _column_types = {
         Boolean: 'BOOLEAN',
@@ -62,6 +88,8 @@ class Table(BaseDialect):
     _how_to_quote_column = '"{}"'
     _column_setter = '{} AS {}'
     _sample_value_function = 'MAX({c})'
+    _templates = TemplateCache()
+    _partition_evolution = True
     
     ENCODE=dict(zip(COLUMN_ENCODE, COLUMN_ENCODE))
 
@@ -75,8 +103,16 @@ class Table(BaseDialect):
             ]
         })
 
+    def advise(self, profile):
+        """
+        Returns the physical design recommendations (`dbsa.advisor.Advice`)
+        from a column statistics profile, given as a dict or a JSON file.
+        """
+        from .advisor import Advice
+        return Advice(self, profile)
+
     def get_create_table(self, filter_fn=None, suffix=''):
-        return Template("""
+        return self._templates.render("""
             CREATE TABLE IF NOT EXISTS {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} (
               {%- for column in t.columns(filter_fn=filter_fn) %}
               {{ column.quoted_name }} {{ column.column_type }}{% if column.default_value %} DEFAULT {{ column.default_value }}{% endif %}{% if column.encode %} ENCODE {{ column.encode|upper }}{% endif %}{% if not loop.last %},{% endif %}
@@ -85,10 +121,10 @@ class Table(BaseDialect):
             {%- for property in t.get_properties() %}
             {{ property }}
             {%- endfor %};
-        """).render(t=self.table, filter_fn=filter_fn, suffix=suffix)
+        """, t=self.table, filter_fn=filter_fn, suffix=suffix)
 
     def get_create_table_as(self, select, embed_select=True, filter_fn=None, suffix=''):
-        return Template("""
+        return self._templates.render("""
             CREATE TABLE IF NOT EXISTS {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }}
             {%- for property in t.get_properties() %}
             {{ property }}
@@ -98,10 +134,10 @@ class Table(BaseDialect):
               {{ column_value }}{% if not loop.last %},{% endif %}
               {%- endfor %}
             FROM {{ select if not embed_select else '({}) AS vw'.format(select.strip().strip(';')) }};
-        """).render(t=self.table, select=select, embed_select=embed_select, filter_fn=filter_fn, suffix=suffix)
+        """, t=self.table, select=select, embed_select=embed_select, filter_fn=filter_fn, suffix=suffix)
 
     def get_create_external_table(self, hdfs_path, fileformat, tblformat, tblproperties=None, filter_fn=None, suffix=''):
-        return Template("""
+        return self._templates.render("""
             CREATE EXTERNAL TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} (
               {%- for column in t.columns(filter_fn=filter_fn, include_partitions=False) %}
               {{ column.quoted_name }} {{ column.column_type }}{% if not loop.last %},{% endif %}
@@ -120,23 +156,23 @@ class Table(BaseDialect):
             {%- if tblproperties %}
             TABLE PROPERTIES ({{ ','.join(tblproperties) }})
             {%- endif %}
-        """).render(t=self.table, filter_fn=filter_fn, suffix=suffix, tblformat=tblformat, fileformat=fileformat, tblproperties=tblproperties, hdfs_path=hdfs_path)
+        """, t=self.table, filter_fn=filter_fn, suffix=suffix, tblformat=tblformat, fileformat=fileformat, tblproperties=tblproperties, hdfs_path=hdfs_path)
 
     def get_create_staging_table(self, cleanup_fn=cleanup_fn, filter_fn=None, include_partitions=False, suffix=''):
-        return Template("""
+        return self._templates.render("""
             CREATE TABLE IF NOT EXISTS {{ t.full_staging_table_name(cleanup_fn=cleanup_fn, quoted=True, with_prefix=True, suffix=suffix) }} (
               {%- for column in t.columns(filter_fn=filter_fn, include_partitions=include_partitions) %}
               {{ column.quoted_name }} {{ column.column_type}}{% if column.default_value %} DEFAULT {{ column.default_value }}{% endif %}{% if column.encode %} ENCODE {{ column.encode|upper }}{% endif %}{% if not loop.last %},{% endif %}
               {%- endfor %}
             );
-        """).render(t=self.table, cleanup_fn=cleanup_fn, filter_fn=filter_fn, include_partitions=include_partitions, suffix=suffix)
+        """, t=self.table, cleanup_fn=cleanup_fn, filter_fn=filter_fn, include_partitions=include_partitions, suffix=suffix)
 
     def get_add_external_current_partition(self, hdfs_path=None, condition='', params=None, ignored_partitions=None, suffix=''):
-        return Template("""
+        return self._templates.render("""
             ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} ADD IF NOT EXISTS PARTITION(
               {{ condition }}
             ) LOCATION '{{ hdfs_path }}'
-        """).render(
+        """,
             t=self.table,
             suffix=suffix,
             hdfs_path=hdfs_path,
@@ -144,12 +180,30 @@ class Table(BaseDialect):
                 .format(**self.table.get_current_partition_params(params))
         )
 
+    def get_add_external_partitions(self, partitions, hdfs_path, ignored_partitions=None, suffix='', max_statement_size=None):
+        """
+        Returns the statements adding every partition value dict to the
+        Spectrum table, as few `ALTER TABLE ... ADD` statements as
+        `max_statement_size` allows. The partitions are located under `hdfs_path`.
+        """
+        condition = self._get_partition_clause_condition(ignored_partitions)
+        clauses = [
+            "PARTITION({}) LOCATION '{}'".format(condition.format(**self.table.get_current_partition_params(params)), location)
+            for params, location in zip(partitions, self.get_partition_locations(partitions, hdfs_path))
+        ]
+        return self._batch_statements("""
+            ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} ADD IF NOT EXISTS
+              {%- for clause in clauses %}
+              {{ clause }}
+              {%- endfor %}
+            """, clauses, max_statement_size, t=self.table, suffix=suffix)
+
     def get_delete_external_current_partition(self, condition='', params=None, ignored_partitions=None, suffix=''):
-        return Template("""
+        return self._templates.render("""
             ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix='') }} DROP IF EXISTS PARTITION(
               {{ condition }}
             )
-        """).render(
+        """,
             t=self.table,
             suffix=suffix,
             condition=self.table.get_current_partition_condition(condition, ignored_partitions, sep=', ') \
@@ -157,40 +211,40 @@ class Table(BaseDialect):
         )
 
     def get_drop_table(self, suffix=''):
-        return Template("""
+        return self._templates.render("""
             DROP TABLE IF EXISTS {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }};
-        """).render(t=self.table, suffix=suffix)
+        """, t=self.table, suffix=suffix)
 
     def get_drop_staging_table(self, suffix=''):
-        return Template("""
+        return self._templates.render("""
             DROP TABLE IF EXISTS {{ t.full_staging_table_name(quoted=True, with_prefix=True, suffix=suffix) }};
-        """).render(t=self.table, suffix=suffix)
+        """, t=self.table, suffix=suffix)
 
     def get_truncate_table(self, suffix=''):
-        return Template("""
+        return self._templates.render("""
             TRUNCATE TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }};
-        """).render(t=self.table, suffix=suffix)
+        """, t=self.table, suffix=suffix)
 
     def get_update_current_partition_for_manually_set_columns(self, suffix='', condition='', ignored_partitions=None, params=None):
-        filter_fn = lambda x: x.manually_set
-        if not len(self.table.columns(filter_fn=filter_fn, include_partitions=False)):
+        columns = self.table.manually_set_columns(include_partitions=False)
+        if not columns:
             return ''
 
-        return Template("""
+        return self._templates.render("""
             UPDATE {{ t.full_table_name(quoted=True, with_prefix=True) }}
             SET
-            {%- for column in t.columns(filter_fn=filter_fn, include_partitions=False) %}
+            {%- for column in columns %}
               {{ column.quoted_name }} = {{ column.value }}{% if not loop.last %},{% endif %}
             {%- endfor %}
             {%- if condition %}
             WHERE {{ condition }}
             {%- endif %}
-        """).render(t=self.table, suffix=suffix, filter_fn=filter_fn,
+        """, t=self.table, suffix=suffix, columns=columns,
                     condition=self.table.get_current_partition_condition(condition, ignored_partitions) \
                         .format(**self.table.get_current_partition_params(params)))
 
     def get_copy_to_staging(self, cleanup_fn=cleanup_fn, filter_fn=None, include_partitions=False, suffix=''):
-        return Template("""
+        return self._templates.render("""
             COPY {{ t.full_staging_table_name(cleanup_fn=cleanup_fn, quoted=True, with_prefix=True, suffix=suffix) }} (
               {%- for column in t.columns(filter_fn=filter_fn, include_partitions=include_partitions) %}
               {{ column.quoted_name }}{% if not loop.last %},{% endif %}
@@ -205,14 +259,141 @@ class Table(BaseDialect):
             {{ '{% endif %}' }}
             {{ '{{ copy_options }}' }}
             {% endraw %};
-        """).render(t=self.table, cleanup_fn=cleanup_fn, filter_fn=filter_fn, include_partitions=include_partitions, suffix=suffix)
+        """, t=self.table, cleanup_fn=cleanup_fn, filter_fn=filter_fn, include_partitions=include_partitions, suffix=suffix)
+
+    def get_copy_manifest_to_staging(self, compression='gzip', cleanup_fn=cleanup_fn, filter_fn=None, include_partitions=False, suffix=''):
+        return self._templates.render("""
+            COPY {{ t.full_staging_table_name(cleanup_fn=cleanup_fn, quoted=True, with_prefix=True, suffix=suffix) }} (
+              {%- for column in t.columns(filter_fn=filter_fn, include_partitions=include_partitions) %}
+              {{ column.quoted_name }}{% if not loop.last %},{% endif %}
+              {%- endfor %}
+            )
+            {% raw %}
+            FROM '{{ '{{ path_prefix }}://{{ path }}' }}'
+            {{ '{% if access_key and secret_key %}' }}
+            WITH CREDENTIALS '{{ 'aws_access_key_id={{ access_key }};aws_secret_access_key={{ secret_key }}' }}'
+            {{ '{% else %}' }}
+            IAM_ROLE '{{ '{{ iam_role }}' }}'
+            {{ '{% endif %}' }}
+            {% endraw %}
+            MANIFEST
+            CSV
+            {%- if compression %}
+            {{ compression|upper }}
+            {%- endif %}
+            {% raw %}
+            {{ '{{ copy_options }}' }}
+            {% endraw %};
+        """, t=self.table, compression=compression, cleanup_fn=cleanup_fn, filter_fn=filter_fn, include_partitions=include_partitions, suffix=suffix)
+
+    def write_copy_files(self, rows, directory, slices, files_per_slice=1, compression='gzip', url=None, prefix=None, cleanup_fn=cleanup_fn, filter_fn=None, include_partitions=False):
+        """
+        Splits the rows (dicts or sequences in column order) evenly into
+        `slices * files_per_slice` compressed CSV files, in the column order of
+        the COPY of `get_copy_manifest_to_staging`, and writes the manifest
+        listing them. The manifest refers to the files under `url`, the prefix
+        they are uploaded to, or to the local paths. Returns the manifest path.
+        """
+        import csv
+        column_names = self.table.column_names(include_partitions=include_partitions, filter_fn=filter_fn, as_list=True)
+        prefix = prefix or self.table.staging_table_name(cleanup_fn=cleanup_fn)
+        filenames = [
+            '{}.{:04d}.csv{}'.format(prefix, i, COMPRESSIONS.get(compression, ''))
+            for i in range(slices * files_per_slice)
+        ]
+
+        files = []
+        try:
+            for filename in filenames:
+                files.append(open_compressed(os.path.join(directory, filename), compression))
+            writers = [csv.writer(f) for f in files]
+            for i, row in enumerate(rows):
+                if isinstance(row, dict):
+                    row = [row.get(name) for name in column_names]
+                writers[i % len(writers)].writerow(row)
+        finally:
+            for f in files:
+                f.close()
+
+        manifest_path = os.path.join(directory, prefix + '.manifest')
+        with open(manifest_path, 'w') as f:
+            json.dump({
+                'entries': [
+                    {
+                        'url': '{}/{}'.format(url.rstrip('/'), filename) if url else os.path.abspath(os.path.join(directory, filename)),
+                        'mandatory': True,
+                    }
+                    for filename in filenames
+                ]
+            }, f, indent=2)
+        return manifest_path
+
+    def get_analyze(self, predicate_columns=False, sortkey_columns=False, suffix=''):
+        """
+        Returns the ANALYZE of the table, limited to the columns used as
+        predicates or to the columns of the `Sortkey`.
+        """
+        sortkey = self.table.get_property_by_type(Sortkey) if sortkey_columns else None
+        return self._templates.render("""
+            ANALYZE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }}
+            {%- if sortkey %} ({% for c in sortkey.attrs['keys'] %}"{{ c }}"{% if not loop.last %}, {% endif %}{% endfor %})
+            {%- elif predicate_columns %} PREDICATE COLUMNS
+            {%- endif %};
+        """, t=self.table, suffix=suffix, sortkey=sortkey, predicate_columns=predicate_columns)
+
+    def get_vacuum(self, mode=None, threshold=None, suffix=''):
+        """
+        Returns the VACUUM of the table. Without `mode` the tables having a
+        `Sortkey` are re-sorted (SORT ONLY), the others only reclaim the
+        deleted rows (DELETE ONLY). `threshold` is the TO n PERCENT target.
+        """
+        if not mode:
+            mode = 'SORT ONLY' if self.table.get_property_by_type(Sortkey) else 'DELETE ONLY'
+        if mode.upper() not in VACUUM_MODES:
+            raise ValueError('Not supported vacuum mode: {}'.format(mode))
+
+        return self._templates.render("""
+            VACUUM {{ mode }} {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }}
+            {%- if threshold %} TO {{ threshold }} PERCENT{% endif %};
+        """, t=self.table, suffix=suffix, mode=mode.upper(), threshold=threshold)
+
+    def get_add_columns(self, columns, suffix=''):
+        return [
+            self._templates.render("""
+            ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} ADD COLUMN {{ column.quoted_name }} {{ column.column_type }}{% if column.default_value %} DEFAULT {{ column.default_value }}{% endif %}{% if column.encode %} ENCODE {{ column.encode|upper }}{% endif %};
+        """, t=self.table, column=column, suffix=suffix)
+            for column in columns
+        ]
+
+    def get_change_column(self, old_name, old_type, column, suffix=''):
+        """
+        Redshift can rename the columns, and widen the VARCHAR columns in place.
+        """
+        import re
+        statements = []
+        if old_name != column.name:
+            statements.append(self._templates.render("""
+            ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} RENAME COLUMN {{ old_name }} TO {{ column.quoted_name }};
+        """, t=self.table, column=column, old_name=self._how_to_quote_column.format(old_name), suffix=suffix))
+
+        if old_type != column.column_type:
+            old_length = re.match(r'^VARCHAR\((\d+)\)$', old_type)
+            new_length = re.match(r'^VARCHAR\((\d+)\)$', column.column_type)
+            if not (old_length and new_length and int(new_length.group(1)) > int(old_length.group(1))):
+                return None
+
+            statements.append(self._templates.render("""
+            ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} ALTER COLUMN {{ column.quoted_name }} TYPE {{ column.column_type }};
+        """, t=self.table, column=column, suffix=suffix))
+
+        return statements
 
     def get_select(self, filter_fn=None, suffix='', condition='', order_by_sortkey=False, use_star=False, transforms=None, limit=None):
         sortkey = self.table.get_property_by_type(Sortkey) \
             if order_by_sortkey \
             else None
 
-        return Template("""
+        return self._templates.render("""
             SELECT
               {%- if use_star %}
               *
@@ -231,14 +412,36 @@ class Table(BaseDialect):
             {%- if limit %}
             LIMIT {{ limit }}
             {%- endif %}
-        """).render(t=self.table, limit=limit, filter_fn=filter_fn, suffix=suffix, condition=condition, sortkey=sortkey, use_star=use_star, tf=transforms or {})
+        """, t=self.table, limit=limit, filter_fn=filter_fn, suffix=suffix, condition=condition, sortkey=sortkey, use_star=use_star, tf=transforms or {})
 
-    def get_unload_table(self, filter_fn=None):
-        return self.get_unload_via_select(select=self.get_select(filter_fn))
+    def get_unload_table(self, filter_fn=None, fileformat=None, partition_by=False, max_file_size=None, parallel=None, manifest=False):
+        """
+        Returns the UNLOAD of the table. `partition_by` writes the files under
+        the `name=value` prefixes of the selected partitions like
+        `partition_definition()`, `max_file_size` is in MB and `parallel`
+        turns PARALLEL ON or OFF.
+        """
+        options = []
+        if fileformat:
+            options.append('FORMAT AS {}'.format(fileformat.upper()))
+        if partition_by and self.table.partitions:
+            # Redshift can only partition by the unloaded columns.
+            partitions = [c for c in self.table.columns(filter_fn=filter_fn) if c.partition]
+            if not partitions:
+                raise ValueError('{} - partition_by requires at least one selected partition column!'.format(self.table.table_name))
+            options.append('PARTITION BY ({})'.format(', '.join(p.quoted_name for p in partitions)))
+        if max_file_size:
+            options.append('MAXFILESIZE {} MB'.format(max_file_size))
+        if parallel is not None:
+            options.append('PARALLEL {}'.format('ON' if parallel else 'OFF'))
+        if manifest:
+            options.append('MANIFEST')
+        return self.get_unload_via_select(select=self.get_select(filter_fn), options=options)
 
     @classmethod
-    def get_unload_via_select(cls, select):
-        return Template(Template("""
+    def get_unload_via_select(cls, select, options=None):
+        from jinja2 import Template
+        return Template(cls._templates.render("""
             UNLOAD ('
               {{ select }}
             ')
@@ -248,11 +451,14 @@ class Table(BaseDialect):
             {{ '{% else %}' }}
             IAM_ROLE '{{ '{{ iam_role }}' }}'
             {{ '{% endif %}' }}
+            {%- for option in options %}
+            {{ option }}
+            {%- endfor %}
             {{ '{{ unload_options }}' }};
-        """).render(select=select.strip().strip(';').translate(str.maketrans({"'": r"\'"}))))
+        """, select=select.strip().strip(';').translate(str.maketrans({"'": r"\'"})), options=options or []))
 
     def get_delete_from(self, condition=None, params=None, using=None, suffix=''):
-        r = Template("""
+        r = self._templates.render("""
             DELETE FROM {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }}
             {%- if using %}
             USING {{ using }} AS u
@@ -260,7 +466,7 @@ class Table(BaseDialect):
             {%- if condition %}
             WHERE {{ condition }}
             {%- endif %};
-        """).render(t=self.table, condition=condition, using=using, suffix=suffix)
+        """, t=self.table, condition=condition, using=using, suffix=suffix)
         if params:
             return r.format(**(params or {}))
         return r
@@ -276,11 +482,55 @@ class Table(BaseDialect):
         )
         return self.get_delete_from(condition, using=using, params=params, suffix=suffix)
 
+    def get_merge(self, pk_columns, cleanup_fn=cleanup_fn, using=None, filter_fn=None, suffix=''):
+        """
+        Returns a single MERGE of the staging table (or `using`) into the
+        table, replacing the `get_delete_upsert` and insert sequence.
+        """
+        table = self.table.full_table_name(quoted=True, with_prefix=True, suffix=suffix)
+        if not using:
+            using = self.table.full_staging_table_name(cleanup_fn=cleanup_fn, quoted=True, with_prefix=True, suffix=suffix)
+
+        updates = [
+            (c.quoted_name, c.load_value('s'))
+            for c in self.table.columns(include_partitions=False, filter_fn=lambda c: c.name not in pk_columns and (not filter_fn or filter_fn(c)))
+        ]
+        if not updates:
+            # Redshift requires the WHEN MATCHED clause, the key is set to itself.
+            key = self.table.get_column(pk_columns[0]).quoted_name
+            updates = [(key, 's.' + key)]
+
+        return self._templates.render("""
+            MERGE INTO {{ table }}
+            USING {{ using }} AS s
+            ON {{ condition }}
+            WHEN MATCHED THEN UPDATE SET
+              {%- for name, value in updates %}
+              {{ name }} = {{ value }}{% if not loop.last %},{% endif %}
+              {%- endfor %}
+            WHEN NOT MATCHED THEN INSERT (
+              {%- for column in columns %}
+              {{ column.quoted_name }}{% if not loop.last %},{% endif %}
+              {%- endfor %}
+            )
+            VALUES (
+              {%- for column in columns %}
+              {{ column.load_value('s') }}{% if not loop.last %},{% endif %}
+              {%- endfor %}
+            );
+        """,
+            table=table,
+            using=using,
+            condition=self.get_merge_condition(pk_columns, target=table),
+            columns=self.table.columns(filter_fn=filter_fn),
+            updates=updates,
+        )
+
     def get_insert_into_from_table(self, source_table_name, filter_fn=None, suffix=''):
         return self.get_insert_into_via_select(select=source_table_name, filter_fn=filter_fn, embed_select=False, suffix=suffix)
 
     def get_insert_into_via_select(self, select, filter_fn=None, embed_select=True, suffix=''):
-        return Template("""
+        return self._templates.render("""
             INSERT INTO {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} (
               {%- for column in t.columns(filter_fn=filter_fn) %}
               {{ column.quoted_name }}{% if not loop.last %},{% endif %}
@@ -291,25 +541,25 @@ class Table(BaseDialect):
               {{ column_value }}{% if not loop.last %},{% endif %}
               {%- endfor %}
             FROM {{ select if not embed_select else '({}) AS vw'.format(select.strip().strip(';')) }};
-        """).render(t=self.table, select=select, embed_select=embed_select, filter_fn=filter_fn, suffix=suffix)
+        """, t=self.table, select=select, embed_select=embed_select, filter_fn=filter_fn, suffix=suffix)
 
     def get_drop_current_partition_view(self, suffix='_latest'):
-        return Template("""
+        return self._templates.render("""
             DROP VIEW IF EXISTS {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }};
-        """).render(t=self.table, suffix=suffix)
+        """, t=self.table, suffix=suffix)
 
     def get_create_current_partition_view(self, suffix='_latest', condition='', ignored_partitions=None, params=None, transforms=None):
-        return Template("""
+        return self._templates.render("""
             CREATE OR REPLACE VIEW {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} AS
             {{ select }};
-        """).render(
+        """,
             t=self.table,
             select=self.get_select_current_partition(condition=condition, ignored_partitions=ignored_partitions, params=params, transforms=transforms),
             suffix=suffix,
         )
 
     def get_create_materialized_view_via_select(self, select, filter_fn=None, embed_select=True, suffix=''):
-        return Template("""
+        return self._templates.render("""
             CREATE MATERIALIZED VIEW {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }}
             {%- for property in t.get_properties() %}
             {{ property }}
@@ -319,14 +569,14 @@ class Table(BaseDialect):
               {{ column_value }}{% if not loop.last %},{% endif %}
               {%- endfor %}
             FROM {{ select if not embed_select else '({}) AS vw'.format(select.strip().strip(';')) }};
-        """).render(t=self.table, select=select, embed_select=embed_select, filter_fn=filter_fn, suffix=suffix)
+        """, t=self.table, select=select, embed_select=embed_select, filter_fn=filter_fn, suffix=suffix)
 
     def get_drop_materialized_view(self, suffix=''):
-        return Template("""
+        return self._templates.render("""
             DROP MATERIALIZED VIEW {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }};
-        """).render(t=self.table, suffix=suffix)
+        """, t=self.table, suffix=suffix)
 
     def get_refresh_materialized_view(self, suffix=''):
-        return Template("""
+        return self._templates.render("""
             REFRESH MATERIALIZED VIEW {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }};
-        """).render(t=self.table, suffix=suffix)
+        """, t=self.table, suffix=suffix)
@@ -0,0 +1,31 @@
+"""
+Table definitions shared by the tests.
+"""
+import dbsa
+
+pii = dbsa.PII(
+    EMAIL=dbsa.DataType(transform_on_insert='FUNC_SHA1({quoted_name})'),
+    IP_ADDRESS=dbsa.DataType(drop_on=dbsa.PII.INSERT),
+)
+
+class Metrics(dbsa.Table):
+    """
+    Daily metrics.
+    """
+    _format = dbsa.Format(format='ORC')
+    ds = dbsa.Partition(dbsa.Varchar(), comment='Date of the metrics.')
+    metric = dbsa.Varchar(comment='Name of the metric.')
+    value = dbsa.Bigint(comment='Value of the metric.')
+    email = dbsa.Varchar(pii=pii.EMAIL)
+    ip = dbsa.Varchar(pii=pii.IP_ADDRESS)
+
+class Events(dbsa.Table):
+    """
+    Incoming events.
+    """
+    _sortkey = dbsa.Sortkey(keys=['ts'])
+    _distkey = dbsa.DistributionKey(key='user_id')
+    ds = dbsa.Partition(dbsa.Varchar(length=10, encode='RAW'))
+    user_id = dbsa.Bigint(encode='ZSTD')
+    ts = dbsa.Timestamp(encode='RAW')
+    name = dbsa.Varchar(length=100, encode='ZSTD')
@@ -0,0 +1,18 @@
+import unittest
+
+from dbsa import redshift
+from dbsa.tests.schemas import Events
+
+COLUMNS = {
+    'user_id': {'cardinality': 2500000, 'null_fraction': 0.0, 'avg_width': 8, 'join': True},
+    'ts': {'cardinality': 86400000, 'null_fraction': 0.0, 'avg_width': 8, 'predicate': True},
+}
+
+
+class AdvisorTestCase(unittest.TestCase):
+    def test_distribution(self):
+        table = redshift.Table(Events(schema='default'))
+        self.assertEqual(table.advise({'row_count': 1000, 'columns': COLUMNS}).diststyle, 'ALL')
+        for profile in ({'row_count': 120000000, 'columns': COLUMNS}, {'columns': COLUMNS}):
+            advice = table.advise(profile)
+            self.assertEqual((advice.diststyle, advice.distkey), ('KEY', 'user_id'))
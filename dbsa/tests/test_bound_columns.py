@@ -0,0 +1,39 @@
+import unittest
+
+import dbsa
+from dbsa import presto
+from dbsa.tests.schemas import Metrics
+
+
+class BoundColumnsTestCase(unittest.TestCase):
+    def test_shared_columns_are_read_only(self):
+        table = presto.Table(Metrics(schema='default', ds="'2019-07-27'"))
+        for c in table.columns(include_partitions=False):
+            with self.assertRaises(dbsa.ColumnReadOnly):
+                c.set_column_value("'X'")
+
+        with self.assertRaises(dbsa.ColumnReadOnly):
+            table.get_column('metric').value = "'X'"
+
+        table = presto.Table(Metrics(schema='default', ds="'2019-07-28'"))
+        self.assertNotIn("'X'", table.get_insert_into_via_select('SELECT 1'))
+
+    def test_attribute_columns_stay_local_to_the_instance(self):
+        table = presto.Table(Metrics(schema='default', ds="'2019-07-27'"))
+        table.table.metric.set_column_value("'X'")
+        self.assertIn('\'X\' AS "metric"', table.get_insert_into_via_select('SELECT 1'))
+        self.assertIs(table.get_column('metric'), table.table.metric)
+
+        table = presto.Table(Metrics(schema='default', ds="'2019-07-28'"))
+        self.assertNotIn("'X'", table.get_insert_into_via_select('SELECT 1'))
+        self.assertIn('\'2019-07-28\' AS "ds"', table.get_insert_into_via_select('SELECT 1'))
+
+    def test_clone(self):
+        table = presto.Table(Metrics(schema='default', ds="'2019-07-27'"))
+        clone = table.clone(ds="'2019-07-28'")
+        clone.table.properties.append(dbsa.Bucket(by=['metric'], count=8))
+        clone.table._policies['PartitionRetentionPolicy'] = dbsa.PartitionRetentionPolicy(ds_ago=7)
+        self.assertEqual(len(table.table.properties), 1)
+        self.assertEqual(table.table._policies, {})
+        self.assertIn('\'2019-07-27\' AS "ds"', table.get_insert_into_via_select('SELECT 1'))
+        self.assertIn('\'2019-07-28\' AS "ds"', clone.get_insert_into_via_select('SELECT 1'))
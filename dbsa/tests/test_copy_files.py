@@ -0,0 +1,63 @@
+import os
+import csv
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+
+from dbsa import redshift
+from dbsa.tests.schemas import Events
+
+ROWS = [
+    {'name': 'event_{}'.format(i), 'ts': '2019-07-27 00:00:{:02d}'.format(i), 'user_id': i}
+    for i in range(10)
+]
+
+
+class CopyFilesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.table = redshift.Table(Events(schema='default', ds="'2019-07-27'"))
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def read_manifest(self, manifest_path):
+        with open(manifest_path) as f:
+            return [entry['url'] for entry in json.load(f)['entries']]
+
+    def test_part_files(self):
+        manifest_path = self.table.write_copy_files(ROWS, self.path, slices=2, files_per_slice=2)
+        paths = self.read_manifest(manifest_path)
+        self.assertEqual(len(paths), 4)
+
+        for i, path in enumerate(paths):
+            self.assertTrue(path.endswith('.{:04d}.csv.gz'.format(i)))
+            with gzip.open(path, 'rt', newline='') as f:
+                rows = list(csv.reader(f))
+            # Round-robin split, in the column order of the COPY.
+            expected = [[str(r['user_id']), r['ts'], r['name']] for r in ROWS[i::4]]
+            self.assertEqual(rows, expected)
+
+        copy = self.table.get_copy_manifest_to_staging()
+        self.assertLess(copy.index('"user_id"'), copy.index('"ts"'))
+        self.assertLess(copy.index('"ts"'), copy.index('"name"'))
+
+    def test_manifest_url(self):
+        manifest_path = self.table.write_copy_files(ROWS, self.path, slices=2, compression=None, url='s3://bucket/events/')
+        self.assertEqual(self.read_manifest(manifest_path), [
+            's3://bucket/events/stg_2019-07-27_events.0000.csv',
+            's3://bucket/events/stg_2019-07-27_events.0001.csv',
+        ])
+        self.assertTrue(os.path.exists(os.path.join(self.path, 'stg_2019-07-27_events.0001.csv')))
+
+    def test_zstd_requires_zstandard(self):
+        try:
+            import zstandard
+        except ImportError:
+            with self.assertRaises(ImportError):
+                self.table.write_copy_files(ROWS, self.path, slices=1, compression='zstd')
+        else:
+            manifest_path = self.table.write_copy_files(ROWS, self.path, slices=1, compression='zstd')
+            self.assertTrue(self.read_manifest(manifest_path)[0].endswith('.csv.zst'))
@@ -0,0 +1,22 @@
+import unittest
+
+from dbsa import hive
+from dbsa.tests.schemas import Metrics
+
+
+class DynamicPartitionsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.table = hive.Table(Metrics(schema='default'))
+
+    def test_insert_overwrite_wraps_the_select(self):
+        statement = self.table.get_insert_overwrite_via_select('SELECT * FROM raw ORDER BY ds LIMIT 10;', dynamic_partitions=True, salt_buckets=4)
+        self.assertIn('SELECT * FROM (SELECT * FROM raw ORDER BY ds LIMIT 10) vw\n            DISTRIBUTE BY `ds`, PMOD(HASH(*), 4)', statement)
+
+    def test_insert_into_from_table(self):
+        statement = self.table.get_insert_into_via_select('default.raw', embed_select=False, dynamic_partitions=True, salt_buckets=4)
+        self.assertIn('FROM (SELECT * FROM default.raw) vw\n            DISTRIBUTE BY `ds`, PMOD(HASH(`metric`, `value`, `email`, `ip`), 4)', statement)
+
+    def test_static_partitions(self):
+        statement = self.table.get_insert_overwrite_via_select('SELECT * FROM raw')
+        self.assertNotIn('DISTRIBUTE BY', statement)
+        self.assertIn('SELECT * FROM raw', statement)
@@ -0,0 +1,28 @@
+import unittest
+
+import dbsa
+from dbsa import trino
+
+
+class Clicks(dbsa.Table):
+    ds = dbsa.Partition(dbsa.Varchar())
+    hour = dbsa.Partition(dbsa.Varchar())
+    user_id = dbsa.Bigint()
+
+
+class OptimizeTestCase(unittest.TestCase):
+    def test_current_partition(self):
+        statement = trino.Table(Clicks(schema='default', ds="'2019-07-27'", hour="'12'")).get_optimize('128MB')
+        self.assertIn("EXECUTE optimize(file_size_threshold => '128MB')\n            WHERE \"ds\" = '2019-07-27' AND \"hour\" = '12'", statement)
+
+    def test_partitions_without_a_value(self):
+        statement = trino.Table(Clicks(schema='default', ds="'2019-07-27'")).get_optimize()
+        self.assertIn("WHERE \"ds\" = '2019-07-27'\n", statement)
+        self.assertNotIn('"hour"', statement)
+
+        statement = trino.Table(Clicks(schema='default', ds="'2019-07-27'", hour="'12'")).get_optimize(ignored_partitions=['ds'])
+        self.assertIn("WHERE \"hour\" = '12'\n", statement)
+
+    def test_whole_table(self):
+        statement = trino.Table(Clicks(schema='default')).get_optimize()
+        self.assertEqual(statement.strip(), 'ALTER TABLE "default"."clicks" EXECUTE optimize')
@@ -0,0 +1,41 @@
+"""
+Import time benchmark of `import dbsa`, measured with `python -X importtime`.
+The package imports in ~2 ms with compiled bytecode, eagerly importing the
+template machinery took ~30 ms.
+"""
+import os
+import sys
+import unittest
+import subprocess
+
+THRESHOLD_US = 15000
+# Standard library modules are left out, the site hooks of the interpreter
+# (e.g. coverage's .pth file) can import them before dbsa.
+LAZY_MODULES = ('jinja2', 'dbsa.presto', 'dbsa.hive', 'dbsa.trino', 'dbsa.redshift', 'dbsa.advisor')
+
+
+def run_python(*args):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    # Stale bytecode would be compiled on every run.
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return subprocess.run([sys.executable] + list(args), env=env, capture_output=True, text=True, check=True)
+
+
+def import_time():
+    result = run_python('-X', 'importtime', '-c', 'import dbsa')
+    for line in result.stderr.splitlines():
+        fields = [f.strip() for f in line.split('|')]
+        if len(fields) == 3 and fields[2] == 'dbsa':
+            return int(fields[1])
+    raise AssertionError('dbsa is missing from the import times:\n' + result.stderr)
+
+
+class ImportTimeTestCase(unittest.TestCase):
+    def test_import_time(self):
+        import_time()
+        cumulative = min(import_time() for _ in range(3))
+        self.assertLess(cumulative, THRESHOLD_US, 'import dbsa took {} us'.format(cumulative))
+
+    def test_lazy_modules(self):
+        script = 'import sys, dbsa; print(",".join(m for m in {!r} if m in sys.modules))'.format(LAZY_MODULES)
+        self.assertEqual(run_python('-c', script).stdout.strip(), '')
@@ -0,0 +1,23 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from dbsa import markdown
+
+
+class WatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_missing_modules_are_skipped(self):
+        modules = [('missing_schema', os.path.join(self.path, 'missing_schema.py'))]
+        self.assertEqual(markdown.get_mtimes(modules), {'missing_schema': None})
+
+        cache = {}
+        self.assertEqual(markdown.update_modules('presto', modules, 1, [self.path], cache), [])
+        markdown.write_modules(modules, 1, cache, output=self.path)
+        self.assertFalse(os.path.exists(os.path.join(self.path, 'missing_schema.md')))
@@ -0,0 +1,95 @@
+"""
+Memory benchmark of the column representations. The sizes depend on the
+interpreter and the allocator, so the columns are compared with the
+representations they replaced instead of absolute byte counts:
+
+- bound columns against the previous unslotted columns, which copied the
+  dialect settings onto every instance,
+- a new table instance sharing the bound columns against the deep copy of
+  the columns every instance used to make.
+"""
+import gc
+import copy
+import unittest
+import tracemalloc
+
+import dbsa
+from dbsa import presto
+
+COLUMNS = 5000
+
+
+class UnslottedDataType(object):
+    def __init__(self):
+        self.drop_on = None
+        self.transform_on_delete = None
+        self.transform_on_insert = None
+        self.name = None
+
+
+class UnslottedColumn(object):
+    # The column representation before the slots.
+    def __init__(self, column_type, **kwargs):
+        self.name = None
+        self.value = None
+        self.default_value = None
+        self.partition = False
+        self.pii = UnslottedDataType()
+        self.attrs = kwargs or {}
+        self.comment = None
+        self.manually_set = False
+        self._creation_counter = 0
+        self._class = column_type
+
+    def register_dialect(self, dialect):
+        self._how_to_quote = dialect._how_to_quote_column
+        self._column_setter = dialect._column_setter
+        self._req_properties = dialect._req_properties.get(self._class)
+        self._column_type = dialect._column_types.get(self._class)
+        for rp in set(self._req_properties or []):
+            setattr(self, rp, self.attrs[rp])
+
+
+def allocated(fn):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = fn()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return after - before
+
+
+def bound_columns(create_column):
+    dialect = presto.Table.__new__(presto.Table)
+    columns = [create_column() for _ in range(COLUMNS)]
+    for c in columns:
+        c.register_dialect(dialect)
+    return columns
+
+
+def wide_table(column_type, **kwargs):
+    columns = {'c{}'.format(i): column_type(**kwargs) for i in range(COLUMNS)}
+    return type('Wide' + column_type.__name__, (dbsa.Table,), columns)
+
+
+class MemoryBenchmarkTestCase(unittest.TestCase):
+    def test_bound_columns(self):
+        slotted = allocated(lambda: bound_columns(dbsa.Bigint))
+        unslotted = allocated(lambda: bound_columns(lambda: UnslottedColumn(dbsa.Bigint)))
+        self.assertLess(slotted, unslotted * 0.75)
+
+    def test_bound_columns_with_attributes(self):
+        slotted = allocated(lambda: bound_columns(lambda: dbsa.Decimal(precision=10, scale=2)))
+        unslotted = allocated(lambda: bound_columns(lambda: UnslottedColumn(dbsa.Decimal, precision=10, scale=2)))
+        self.assertLess(slotted, unslotted)
+
+    def test_shared_bound_columns(self):
+        for table in (wide_table(dbsa.Bigint), wide_table(dbsa.Decimal, precision=10, scale=2)):
+            bound = presto.Table(table(schema='default'))
+            instance = allocated(lambda: presto.Table(table(schema='default')))
+            deep_copy = allocated(lambda: copy.deepcopy(bound.table.columns()))
+            self.assertLess(instance, deep_copy * 0.05)
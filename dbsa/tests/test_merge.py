@@ -0,0 +1,12 @@
+import unittest
+
+from dbsa import redshift
+from dbsa.tests.schemas import Events
+
+
+class RedshiftMergeTestCase(unittest.TestCase):
+    def test_matched_clause_without_updated_columns(self):
+        table = redshift.Table(Events(schema='default', ds="'2019-07-27'"))
+        statement = table.get_merge(['user_id', 'ts', 'name'])
+        self.assertIn('WHEN MATCHED THEN UPDATE SET\n              "user_id" = s."user_id"\n', statement)
+        self.assertIn('WHEN NOT MATCHED THEN INSERT', statement)
@@ -0,0 +1,49 @@
+import unittest
+
+import dbsa
+from dbsa import presto, hive, redshift
+from dbsa.tests.schemas import Metrics, Events
+
+PARTITIONS = [{'ds': "'2019-07-{:02d}'".format(i)} for i in range(1, 29)]
+
+
+class BatchPartitionsTestCase(unittest.TestCase):
+    def test_statements_stay_under_the_size_limit(self):
+        for statements in (
+            presto.Table(Metrics(schema='default')).get_delete_partitions(PARTITIONS, max_statement_size=400),
+            hive.Table(Metrics(schema='default')).get_delete_partitions(PARTITIONS, max_statement_size=400),
+            hive.Table(Metrics(schema='default')).get_add_partitions(PARTITIONS, hdfs_path='s3://bucket/metrics', max_statement_size=600),
+            redshift.Table(Events(schema='default')).get_add_external_partitions(PARTITIONS, 's3://bucket/metrics', max_statement_size=600),
+        ):
+            self.assertGreater(len(statements), 1)
+            for statement in statements:
+                self.assertLessEqual(len(statement), 600)
+            self.assertEqual(sum(s.count("'2019-07-") for s in statements), len(PARTITIONS))
+
+    def test_every_partition_ignored(self):
+        for table in (presto.Table(Metrics(schema='default')), hive.Table(Metrics(schema='default'))):
+            with self.assertRaises(ValueError):
+                table.get_delete_partitions(PARTITIONS, ignored_partitions=['ds'])
+
+
+class Hourly(dbsa.Table):
+    _retention = dbsa.PartitionRetentionPolicy(ds_ago=30, earliest_partition={'ds': "'2019-06-27'", 'hour': "'12'"}, drop_older=True)
+    ds = dbsa.Partition(dbsa.Varchar())
+    hour = dbsa.Partition(dbsa.Varchar())
+    value = dbsa.Bigint()
+
+
+class PartitionsBeforeTestCase(unittest.TestCase):
+    def test_partitions_are_compared_in_order(self):
+        table = presto.Table(Hourly(schema='default'))
+        statement = table.lookup_policy(dbsa.PartitionRetentionPolicy).resolve(table)
+        self.assertIn('''WHERE ("ds" < '2019-06-27' OR ("ds" = '2019-06-27' AND "hour" < '12'))''', statement)
+
+    def test_hive_compares_one_partition(self):
+        table = hive.Table(Hourly(schema='default', ds="'2019-06-27'", hour="'12'"))
+        with self.assertRaises(ValueError):
+            table.get_delete_partitions_before()
+
+        statement = table.get_delete_partitions_before(ignored_partitions=['hour'])
+        self.assertIn("`ds` < '2019-06-27'", statement)
+        self.assertNotIn('`hour`', statement)
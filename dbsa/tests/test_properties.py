@@ -0,0 +1,30 @@
+import unittest
+
+import dbsa
+from dbsa import hive, trino
+
+
+class Lookups(dbsa.Table):
+    _bucket = dbsa.Bucket(by=['user_id', 'name'], count=16)
+    _sorted_by = dbsa.SortedBy(by=['user_id'])
+    user_id = dbsa.Bigint()
+    name = dbsa.Varchar()
+
+
+class HivePropertiesTestCase(unittest.TestCase):
+    def test_bucket(self):
+        statement = hive.Table(Lookups(schema='default')).get_create_table()
+        self.assertIn('CLUSTERED BY (user_id, name) SORTED BY (user_id) INTO 16 BUCKETS', statement)
+
+
+class Clicks(dbsa.Table):
+    _transforms = dbsa.PartitionTransforms(by=['day(ts)'])
+    ds = dbsa.Partition(dbsa.Varchar())
+    ts = dbsa.Timestamp()
+
+
+class TrinoPropertiesTestCase(unittest.TestCase):
+    def test_partition_transforms(self):
+        table = trino.Table(Clicks(schema='default'))
+        self.assertNotIn('day(ts)', table.get_create_table())
+        self.assertIn("'day(ts)'", table.get_create_table(iceberg=True))
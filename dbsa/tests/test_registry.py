@@ -0,0 +1,67 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+import dbsa
+
+SCHEMA_MODULE = '''
+import dbsa
+
+class Events(dbsa.Table):
+    ds = dbsa.Partition(dbsa.Varchar())
+    name = dbsa.Varchar()
+'''
+
+
+class TableRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        for package in ('first', 'second'):
+            os.mkdir(os.path.join(self.path, package))
+            open(os.path.join(self.path, package, '__init__.py'), 'w').close()
+            with open(os.path.join(self.path, package, 'default.py'), 'w') as f:
+                f.write(SCHEMA_MODULE)
+        sys.path.insert(0, self.path)
+        self.registry = dbsa.TableRegistry()
+
+    def tearDown(self):
+        sys.path.remove(self.path)
+        for module_name in ('first', 'first.default', 'second', 'second.default'):
+            sys.modules.pop(module_name, None)
+        shutil.rmtree(self.path)
+
+    def test_build_index(self):
+        index = self.registry.build_index(['first.default'], os.path.join(self.path, 'index.json'))
+        self.assertEqual(index, {'default.Events': 'first.default'})
+        self.assertIs(self.registry.resolve('default.Events'), sys.modules['first.default'].Events)
+
+        registry = dbsa.TableRegistry()
+        registry.load_index(os.path.join(self.path, 'index.json'))
+        self.assertIn('default.Events', registry)
+
+    def test_duplicate_aliases(self):
+        with self.assertRaises(ValueError):
+            self.registry.build_index(['first.default', 'second.default'])
+
+        self.registry.build_index(['first.default'])
+        with self.assertRaises(ValueError):
+            self.registry.build_index(['second.default'])
+
+    def test_registries_share_the_tables(self):
+        self.registry.build_index(['first.default'])
+        self.assertIn('first.default.Events', dbsa.registry)
+        self.assertNotIn('default.Events', dbsa.registry)
+
+    def test_resolve_unknown_table(self):
+        for name in ('default.Unknown', 'unknown_schema.Events', 'Events'):
+            with self.assertRaises(LookupError):
+                self.registry.resolve(name)
+
+    def test_index_module(self):
+        output = os.path.join(self.path, 'index.json')
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([self.path] + sys.path))
+        subprocess.check_call([sys.executable, '-m', 'dbsa.index', output, 'first.default'], env=env, stdout=subprocess.DEVNULL)
+        self.assertTrue(os.path.exists(output))
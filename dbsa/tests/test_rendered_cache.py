@@ -0,0 +1,85 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import subprocess
+import sys
+from unittest import mock
+
+import dbsa
+from dbsa import presto, hive
+from dbsa.tests.schemas import Metrics
+
+
+class RenderedCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache = dbsa.RenderedCache(os.path.join(self.path, 'rendered.sqlite'), max_entries=3)
+        dbsa.Dialect.set_rendered_cache(self.cache)
+
+    def tearDown(self):
+        dbsa.Dialect.set_rendered_cache(None)
+        shutil.rmtree(self.path)
+
+    def test_cached_statements(self):
+        table = presto.Table(Metrics(schema='default', ds="'2019-07-27'"))
+        statement = table.render_cached('get_create_table')
+        self.assertEqual(table.render_cached('get_create_table'), statement)
+        self.assertEqual(statement, table.get_create_table())
+        self.assertEqual(self.cache.cache_info(), {'hits': 1, 'misses': 1, 'errors': 0, 'size': 1})
+
+    def test_eviction(self):
+        table = presto.Table(Metrics(schema='default'))
+        for suffix in ('_1', '_2', '_3', '_4'):
+            table.render_cached('get_drop_table', suffix=suffix)
+        self.assertEqual(self.cache.cache_info()['size'], 3)
+
+    def test_callables_are_not_cached(self):
+        table = presto.Table(Metrics(schema='default'))
+        table.render_cached('get_create_table', filter_fn=lambda c: c.name != 'ip')
+        self.assertEqual(self.cache.cache_info()['size'], 0)
+
+    def test_fingerprint(self):
+        table = presto.Table(Metrics(schema='default', ds="'2019-07-27'"))
+        fingerprint = table.fingerprint()
+        self.assertEqual(presto.Table(Metrics(schema='default', ds="'2019-07-27'")).fingerprint(), fingerprint)
+        self.assertNotEqual(presto.Table(Metrics(schema='default', ds="'2019-07-28'")).fingerprint(), fingerprint)
+        self.assertNotEqual(hive.Table(Metrics(schema='default', ds="'2019-07-27'")).fingerprint(), fingerprint)
+
+        column = table.table.metric
+        self.assertEqual(table.fingerprint(), fingerprint)
+        column.set_column_value("'X'")
+        self.assertNotEqual(table.fingerprint(), fingerprint)
+        self.assertIn('\'X\' AS "metric"', table.render_cached('get_insert_into_via_select', 'SELECT 1'))
+
+    def test_fresh_instances(self):
+        statement = presto.Table(Metrics(schema='default', ds="'2019-07-27'")).render_cached('get_create_table')
+        with mock.patch('dbsa.hash_description', wraps=dbsa.hash_description) as hash_description:
+            for _ in range(5):
+                self.assertEqual(presto.Table(Metrics(schema='default', ds="'2019-07-27'")).render_cached('get_create_table'), statement)
+        # The class and its bound columns are not hashed again for every instance.
+        self.assertEqual(hash_description.call_count, 5)
+        self.assertEqual(self.cache.cache_info()['hits'], 5)
+
+    def test_fingerprint_is_stable_between_processes(self):
+        script = 'from dbsa import presto; from dbsa.tests.schemas import Metrics; print(presto.Table(Metrics(schema="default")).fingerprint())'
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path), PYTHONHASHSEED='random')
+        fingerprints = {subprocess.check_output([sys.executable, '-c', script], env=env, text=True).strip() for _ in range(2)}
+        self.assertEqual(fingerprints, {presto.Table(Metrics(schema='default')).fingerprint()})
+
+    def test_failing_cache(self):
+        table = presto.Table(Metrics(schema='default'))
+        dbsa.Dialect.set_rendered_cache(dbsa.RenderedCache(os.path.join(self.path, 'missing', 'rendered.sqlite')))
+        self.assertEqual(table.render_cached('get_create_table'), table.get_create_table())
+
+        cache = dbsa.RenderedCache(self.cache.path, timeout=0.01)
+        dbsa.Dialect.set_rendered_cache(cache)
+        lock = sqlite3.connect(self.cache.path, isolation_level=None)
+        self.cache.connection
+        lock.execute('BEGIN EXCLUSIVE')
+        try:
+            self.assertEqual(table.render_cached('get_create_table'), table.get_create_table())
+        finally:
+            lock.execute('ROLLBACK')
+        self.assertGreater(cache.errors, 0)
@@ -0,0 +1,77 @@
+import unittest
+
+import dbsa
+from dbsa import presto, hive, redshift
+from dbsa.tests.schemas import Metrics
+
+
+class Lookups(dbsa.Table):
+    user_id = dbsa.Bigint()
+    name = dbsa.Varchar()
+
+
+class SchemaEvolutionTestCase(unittest.TestCase):
+    def test_snapshot(self):
+        snapshot = hive.Table(Metrics(schema='default')).get_schema_snapshot()
+        evolution = hive.Table(Metrics(schema='default')).get_schema_evolution(snapshot)
+        self.assertEqual(evolution.statements, [])
+        self.assertFalse(evolution.requires_rebuild)
+
+    def test_snapshot_of_another_dialect(self):
+        snapshot = presto.Table(Metrics(schema='default')).get_schema_snapshot()
+        with self.assertRaises(dbsa.NotSupportedDialect):
+            hive.Table(Metrics(schema='default')).get_schema_evolution(snapshot)
+
+    def test_snapshot_of_another_table(self):
+        snapshot = hive.Table(Lookups(schema='default')).get_schema_snapshot()
+        with self.assertRaises(ValueError):
+            hive.Table(Metrics(schema='default')).get_schema_evolution(snapshot)
+
+
+class Scores(dbsa.Table):
+    user_id = dbsa.Bigint(encode='zstd')
+    score = dbsa.Bigint(encode='zstd')
+
+
+class ScoresWithRank(dbsa.Table):
+    user_id = dbsa.Bigint(encode='zstd')
+    rank = dbsa.Bigint(encode='zstd')
+    score = dbsa.Bigint(encode='zstd')
+    count = dbsa.Bigint(encode='zstd')
+
+
+class ScoresWithId(dbsa.Table):
+    id = dbsa.Bigint(encode='zstd')
+    user_id = dbsa.Bigint(encode='zstd')
+    score = dbsa.Bigint(encode='zstd')
+
+
+class ColumnOrderTestCase(unittest.TestCase):
+    def evolve(self, dialect, table, previous=Scores):
+        table = dialect.Table(table(schema='default'))
+        snapshot = dialect.Table(previous(schema='default')).get_schema_snapshot()
+        snapshot['table'] = table.table.table_name
+        return table.get_schema_evolution(snapshot)
+
+    def test_hive_moves_the_column(self):
+        evolution = self.evolve(hive, ScoresWithRank)
+        self.assertFalse(evolution.requires_rebuild)
+        self.assertEqual([s.strip() for s in evolution.statements], [
+            'ALTER TABLE `default`.`scores_with_rank` ADD COLUMNS (\n              `rank` BIGINT,\n              `count` BIGINT\n            ) CASCADE',
+            'ALTER TABLE `default`.`scores_with_rank` CHANGE COLUMN `rank` `rank` BIGINT AFTER `user_id` CASCADE',
+        ])
+
+    def test_hive_moves_the_column_first(self):
+        evolution = self.evolve(hive, ScoresWithId)
+        self.assertEqual(evolution.statements[-1].strip(), 'ALTER TABLE `default`.`scores_with_id` CHANGE COLUMN `id` `id` BIGINT FIRST CASCADE')
+
+    def test_rebuild(self):
+        for dialect in (presto, redshift):
+            evolution = self.evolve(dialect, ScoresWithRank)
+            self.assertEqual(evolution.rebuild_reasons, ['column rank is added before existing columns'])
+
+    def test_unchanged_order(self):
+        for dialect in (hive, presto, redshift):
+            evolution = self.evolve(dialect, Scores)
+            self.assertEqual(evolution.statements, [])
+            self.assertFalse(evolution.requires_rebuild)
@@ -0,0 +1,26 @@
+import unittest
+
+from dbsa import presto, hive
+from dbsa.tests.schemas import Metrics
+
+
+class AnalyzeCurrentPartitionTestCase(unittest.TestCase):
+    def test_presto(self):
+        statement = presto.Table(Metrics(schema='default', ds="'2019-07-27'")).get_analyze_current_partition()
+        self.assertIn("WITH (partitions = ARRAY[ARRAY['2019-07-27']])", statement)
+
+        for statement in (
+            presto.Table(Metrics(schema='default')).get_analyze_current_partition(),
+            presto.Table(Metrics(schema='default', ds="'2019-07-27'")).get_analyze_current_partition(ignored_partitions=['ds']),
+        ):
+            self.assertEqual(statement.strip(), 'ANALYZE "default"."metrics"')
+
+    def test_hive(self):
+        statement = hive.Table(Metrics(schema='default', ds="'2019-07-27'")).get_analyze_current_partition()
+        self.assertIn("`ds` = '2019-07-27'", statement)
+
+        for statement in (
+            hive.Table(Metrics(schema='default')).get_analyze_current_partition(),
+            hive.Table(Metrics(schema='default', ds="'2019-07-27'")).get_analyze_current_partition(ignored_partitions=['ds']),
+        ):
+            self.assertIn('PARTITION(\n              `ds`\n            )', statement)
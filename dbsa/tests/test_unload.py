@@ -0,0 +1,19 @@
+import unittest
+
+import dbsa
+from dbsa import redshift
+
+
+class HourlyEvents(dbsa.Table):
+    ds = dbsa.Partition(dbsa.Varchar(length=10, encode='RAW'))
+    hour = dbsa.Partition(dbsa.Varchar(length=2, encode='RAW'))
+    user_id = dbsa.Bigint(encode='ZSTD')
+
+
+class UnloadTestCase(unittest.TestCase):
+    def test_partition_by(self):
+        table = redshift.Table(HourlyEvents(schema='default'))
+        self.assertIn('PARTITION BY ("ds", "hour")', table.get_unload_table(partition_by=True).render())
+        self.assertIn('PARTITION BY ("ds")', table.get_unload_table(partition_by=True, filter_fn=lambda c: c.name != 'hour').render())
+        with self.assertRaises(ValueError):
+            table.get_unload_table(partition_by=True, filter_fn=lambda c: not c.partition)
@@ -0,0 +1,142 @@
+import textwrap
+import unittest
+
+from dbsa import presto
+from dbsa.tests.schemas import Metrics
+
+
+def normalize(sql):
+    return textwrap.dedent(sql.strip('\n')).rstrip()
+
+
+NOT_EXISTS = """
+    WITH incremental_update AS (
+        SELECT * FROM incremental
+    )
+    SELECT
+      "metric",
+      "value",
+      FUNC_SHA1("email") AS "email",
+      NULL AS "ip"
+    FROM incremental_update
+    UNION ALL
+    SELECT
+      "metric",
+      "value",
+      FUNC_SHA1("email") AS "email",
+      NULL AS "ip"
+    FROM (
+    SELECT
+      "metric",
+      "value",
+      "email",
+      "ip"
+    FROM "default"."metrics"
+    WHERE "ds" = '2019-07-27'
+) AS d
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM incremental_update AS u
+        WHERE
+          u."metric" = d."metric"
+    )
+"""
+
+LEFT_JOIN = """
+    WITH incremental_update AS (
+        SELECT * FROM incremental
+    )
+    SELECT
+      "metric",
+      "value",
+      FUNC_SHA1("email") AS "email",
+      NULL AS "ip"
+    FROM incremental_update
+    UNION ALL
+    SELECT
+      d."metric" AS "metric",
+      d."value" AS "value",
+      FUNC_SHA1(d."email") AS "email",
+      NULL AS "ip"
+    FROM (
+    SELECT
+      "metric",
+      "value",
+      "email",
+      "ip"
+    FROM "default"."metrics"
+    WHERE "ds" = '2019-07-27'
+) AS d
+    LEFT JOIN incremental_update AS u ON
+      u."metric" = d."metric"
+    WHERE
+      u."metric" IS NULL
+"""
+
+ROW_NUMBER = """
+    WITH incremental_update AS (
+        SELECT * FROM incremental
+    )
+    SELECT
+      "metric",
+      "value",
+      "email",
+      "ip"
+    FROM (
+        SELECT
+          *,
+          ROW_NUMBER() OVER (PARTITION BY "metric" ORDER BY upsert_priority) AS upsert_row_number
+        FROM (
+            SELECT
+              "metric",
+              "value",
+              FUNC_SHA1("email") AS "email",
+              NULL AS "ip",
+              0 AS upsert_priority
+            FROM incremental_update
+            UNION ALL
+            SELECT
+              "metric",
+              "value",
+              FUNC_SHA1("email") AS "email",
+              NULL AS "ip",
+              1 AS upsert_priority
+            FROM (
+    SELECT
+      "metric",
+      "value",
+      "email",
+      "ip"
+    FROM "default"."metrics"
+    WHERE "ds" = '2019-07-27'
+) AS d
+        ) AS c
+    ) AS r
+    WHERE upsert_row_number = 1
+"""
+
+
+class UpsertStrategiesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.table = presto.Table(Metrics(schema='default', ds="'2019-07-27'"))
+
+    def assertUpsert(self, strategy, expected):
+        statement = self.table.get_upsert_select('SELECT * FROM incremental', primary_keys=['metric'], strategy=strategy)
+        self.assertEqual(normalize(statement), normalize(expected))
+
+    def test_not_exists(self):
+        self.assertUpsert('not_exists', NOT_EXISTS)
+
+    def test_left_join(self):
+        self.assertUpsert('left_join', LEFT_JOIN)
+
+    def test_row_number(self):
+        self.assertUpsert('row_number', ROW_NUMBER)
+
+    def test_default_strategy(self):
+        statement = self.table.get_upsert_select('SELECT * FROM incremental', primary_keys=['metric'])
+        self.assertEqual(normalize(statement), normalize(NOT_EXISTS))
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            self.table.get_upsert_select('SELECT * FROM incremental', primary_keys=['metric'], strategy='merge')
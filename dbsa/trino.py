@@ -1,7 +1,5 @@
-from . import ExternalTableProperties as BaseExternalTableProperties
+from . import ExternalTableProperties as BaseExternalTableProperties, TemplateCache, Bucket, PartitionTransforms
 from .presto import Table as BaseTable
-from jinja2 import Template
-import inspect
 import datetime
 import numbers
 import decimal
@@ -9,45 +7,83 @@ import decimal
 class ExternalTableProperties(BaseExternalTableProperties):
     def get_properies(self):
         properties = [
-            Template("external_location = '{{ location }}'").render(location=self.location)
+            Table._templates.render("external_location = '{{ location }}'", location=self.location)
         ]
 
         for k, v in self.configs.items():
-            properties.append(Template("{{ k }} = {% if v is number %}{{ v }}{% else %}'{{ v }}'{% endif %}").render(k=k, v=v))
+            properties.append(Table._templates.render("{{ k }} = {% if v is number %}{{ v }}{% else %}'{{ v }}'{% endif %}", k=k, v=v))
 
         return properties
 
 
 class Table(BaseTable):
+    _req_properties = {
+        **BaseTable._req_properties,
+        PartitionTransforms: {'by'},
+    }
+    _property_types = {
+        **BaseTable._property_types,
+        PartitionTransforms: "partitioning = ARRAY[{% for c in by %}'{{ c }}'{% if not loop.last %}, {% endif %}{% endfor %}]",
+    }
     _how_to_quote_string = "'{}'"
-
-    def get_create_table_properties(self, external_table_properties=None):
+    _templates = TemplateCache()
+
+    def get_iceberg_partitioning(self):
+        """
+        Returns the Iceberg partitioning of the table: the identity partitions,
+        the `Bucket` as bucket transforms and the `PartitionTransforms`,
+        e.g. `day(ts)`.
+        """
+        partitioning = [p.name for p in self.table.partitions]
+        bucket = self.table.get_property_by_type(Bucket)
+        if bucket:
+            partitioning.extend('bucket({}, {})'.format(c, bucket.attrs['count']) for c in bucket.attrs['by'])
+        transforms = self.table.get_property_by_type(PartitionTransforms)
+        if transforms:
+            partitioning.extend(transforms.attrs['by'])
+        return partitioning
+
+    def get_create_table_properties(self, external_table_properties=None, iceberg=False):
         create_table_properties = []
 
-        if self.table.partitions:
-            create_table_properties.append(Template(
-            """partitioned_by = ARRAY[
+        if iceberg:
+            partitioning = self.get_iceberg_partitioning()
+            if partitioning:
+                create_table_properties.append(self._templates.render(
+                """partitioning = ARRAY[
+                {%- for partition in partitioning %}
+                '{{ partition }}'{% if not loop.last %},{% endif %}
+                {%- endfor %}
+              ]""", partitioning=partitioning))
+            properties = [p for p in self.table.get_properties() if not isinstance(p, (Bucket, PartitionTransforms))]
+        else:
+            if self.table.partitions:
+                create_table_properties.append(self._templates.render(
+                """partitioned_by = ARRAY[
                 {%- for partition in t.partitions %}
                 '{{ partition.name }}'{% if not loop.last %},{% endif %}
                 {%- endfor %}
-              ]""").render(t=self.table))
+              ]""", t=self.table))
+            # Partition transforms are Iceberg only, the Hive connector has no such property.
+            properties = [p for p in self.table.get_properties() if not isinstance(p, PartitionTransforms)]
 
-        if self.table.get_properties():
-            create_table_properties.append(Template(
-            """{%- for property in t.get_properties() %}
+        if properties:
+            create_table_properties.append(self._templates.render(
+            """{%- for property in properties %}
               {{ property }}{% if not loop.last %},{% endif %}
-              {%- endfor %}""").render(t=self.table))
+              {%- endfor %}""", properties=properties))
 
         if external_table_properties and external_table_properties.get_properies():
-            create_table_properties.append(Template(
+            create_table_properties.append(self._templates.render(
             """{%- for property in etp %}
               {{ property }}{% if not loop.last %},{% endif %}
-              {%- endfor %}""").render(etp=external_table_properties.get_properies()))
+              {%- endfor %}""", etp=external_table_properties.get_properies()))
 
         return create_table_properties
 
-    def get_create_table(self, filter_fn=None, suffix='', external_table_properties=None):
-        return Template("""
+    def get_create_table(self, filter_fn=None, suffix='', external_table_properties=None, iceberg=False):
+        import inspect
+        return self._templates.render("""
             CREATE TABLE IF NOT EXISTS {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} (
               {%- for column in d.columns(filter_fn=filter_fn) %}
               {{ column.quoted_name }} {{ column.column_type}}{% if column.comment %} COMMENT '{{ column.comment|replace("'", "''") }}'{% endif %}{% if not loop.last %},{% endif %}
@@ -63,11 +99,11 @@ class Table(BaseTable):
               {%- endfor %}
             )
             {%- endif %}
-        """).render(t=self.table, d=self, filter_fn=filter_fn, inspect=inspect, suffix=suffix, tbl_properties=self.get_create_table_properties(external_table_properties))
+        """, t=self.table, d=self, filter_fn=filter_fn, inspect=inspect, suffix=suffix, tbl_properties=self.get_create_table_properties(external_table_properties, iceberg))
 
     def get_current_partition_list(self, ignored_partitions=None):
-        partition_names = {p.name for p in self.partitions} - set(ignored_partitions or [])
-        partitions = [p for p in self.partitions if p.name in partition_names]
+        ignored_partitions = set(ignored_partitions or [])
+        partitions = [p for p in self.table.partitions if p.name not in ignored_partitions]
         partition_list = ', '.join([f"'{p.name}'" for p in partitions])
         partition_values = ', '.join([f"{{{p.name}}}" for p in partitions])
 
@@ -83,12 +119,88 @@ class Table(BaseTable):
     def get_add_current_partition(self, hdfs_path=None, condition='', params=None, ignored_partitions=None, suffix=''):
         current_partition_params = {k: self._param_to_quoted_sting(v) for k, v in self.table.get_current_partition_params(params).items()}
 
-        return Template("""
+        return self._templates.render("""
             CALL system.{% if hdfs_path %}register_partition{% else %}create_empty_partition{% endif %}('{{ t.schema }}', '{{ t.table_name_with_prefix }}', {{ condition }}{% if hdfs_path %}, '{{ hdfs_path }}'{% endif %})
-        """).render(
+        """,
             t=self.table,
             suffix=suffix,
             hdfs_path=hdfs_path,
             condition=self.get_current_partition_list(ignored_partitions) \
                 .format(**current_partition_params)
         )
+
+    def get_add_partitions(self, partitions, hdfs_path=None, ignored_partitions=None, suffix=''):
+        """
+        Returns the procedure calls registering every partition value dict,
+        Trino has no multi partition form, so it is one call per partition.
+        """
+        locations = self.get_partition_locations(partitions, hdfs_path) if hdfs_path else [None] * len(partitions)
+        return [
+            self.get_add_current_partition(hdfs_path=location, params=params, ignored_partitions=ignored_partitions, suffix=suffix)
+            for params, location in zip(partitions, locations)
+        ]
+
+    def get_merge(self, select, primary_keys, filter_fn=None, embed_select=True, suffix=''):
+        """
+        Returns a single MERGE updating the matching rows and inserting the
+        new ones of `select`. The partitions and the primary keys are not updated.
+        """
+        return self._templates.render("""
+            MERGE INTO {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} AS t
+            USING {{ select if not embed_select else '({})'.format(select.strip().strip(';')) }} AS s
+            ON {{ condition }}
+            {%- if updated_columns %}
+            WHEN MATCHED THEN UPDATE SET
+              {%- for column in updated_columns %}
+              {{ column.quoted_name }} = {{ column.load_value('s') }}{% if not loop.last %},{% endif %}
+              {%- endfor %}
+            {%- endif %}
+            WHEN NOT MATCHED THEN INSERT (
+              {%- for column in columns %}
+              {{ column.quoted_name }}{% if not loop.last %},{% endif %}
+              {%- endfor %}
+            )
+            VALUES (
+              {%- for column in columns %}
+              {{ column.load_value('s') }}{% if not loop.last %},{% endif %}
+              {%- endfor %}
+            )
+        """,
+            t=self.table,
+            select=select,
+            embed_select=embed_select,
+            suffix=suffix,
+            condition=self.get_merge_condition(primary_keys),
+            columns=self.table.columns(filter_fn=filter_fn),
+            updated_columns=self.table.columns(include_partitions=False, filter_fn=lambda c: c.name not in primary_keys and (not filter_fn or filter_fn(c))),
+        )
+
+    def get_optimize(self, file_size_threshold=None, condition='', params=None, ignored_partitions=None, suffix=''):
+        """
+        Returns the Iceberg compaction of the current partition, rewriting the
+        files smaller than `file_size_threshold` (e.g. `'128MB'`). The ignored
+        partitions and the ones without a value are compacted for every value.
+        """
+        partition_params = self.table.get_current_partition_params(params)
+        ignored_partitions = set(ignored_partitions or []) | {p.name for p in self.table.partitions if p.name not in partition_params}
+        return self._templates.render("""
+            ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} EXECUTE optimize{% if file_size_threshold %}(file_size_threshold => '{{ file_size_threshold }}'){% endif %}
+            {%- if condition %}
+            WHERE {{ condition }}
+            {%- endif %}
+        """,
+            t=self.table,
+            suffix=suffix,
+            file_size_threshold=file_size_threshold,
+            condition=self.table.get_current_partition_condition(condition, ignored_partitions).format(**partition_params)
+        )
+
+    def get_expire_snapshots(self, retention_threshold='7d', suffix=''):
+        return self._templates.render("""
+            ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} EXECUTE expire_snapshots(retention_threshold => '{{ retention_threshold }}')
+        """, t=self.table, suffix=suffix, retention_threshold=retention_threshold)
+
+    def get_remove_orphan_files(self, retention_threshold='7d', suffix=''):
+        return self._templates.render("""
+            ALTER TABLE {{ t.full_table_name(quoted=True, with_prefix=True, suffix=suffix) }} EXECUTE remove_orphan_files(retention_threshold => '{{ retention_threshold }}')
+        """, t=self.table, suffix=suffix, retention_threshold=retention_threshold)
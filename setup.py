@@ -1,5 +1,9 @@
+import os
+import re
 from setuptools import setup, find_packages
-version = '0.0.48'
+
+with open(os.path.join(os.path.dirname(__file__), 'dbsa', '__init__.py')) as f:
+    version = re.search(r"^__version__ = '(.*?)'$", f.read(), re.M).group(1)
 
 setup(
     name='dbsa',
@@ -14,9 +18,13 @@ setup(
     install_requires=[
         'jinja2',
     ],
+    extras_require={
+        'zstd': ['zstandard'],
+    },
     entry_points={
         'console_scripts': [
             'dbsa-markdown = dbsa.markdown:main',
+            'dbsa-index = dbsa.index:main',
         ],
     },
     test_suite="dbsa.tests",